@@ -1,17 +1,34 @@
-import json
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from openai import OpenAI
 import textwrap
 import re
 
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from src.utils.concurrency import map_bounded
+from src.utils.json_stream import stream_chat_objects
+
+
+# Each section prompt stays the size the old single prompt was (~4,000 chars)
+SECTION_MAX_TOKENS = 1000
+
+# Extra questions asked per section so duplicates can be dropped without coming up short
+OVERSAMPLE_PER_SECTION = 1
+
+# Cosine similarity above which two questions count as the same question
+DUPLICATE_SIMILARITY = 0.9
+
 
 # ----------------------------------------------------------
 # Construct prompt for MCQ generation
 # ----------------------------------------------------------
 def _build_mcq_prompt(source_text: str, num_questions: int, difficulty: str) -> str:
 
-    # Trim overly long text for cost/performance
-    max_chars = 4000
+    # Trim overly long text for cost/performance (sections already fit)
+    max_chars = SECTION_MAX_TOKENS * 4
     if len(source_text) > max_chars:
         source_text = source_text[:max_chars]
 
@@ -58,81 +75,239 @@ TEXT:
 
 
 # ----------------------------------------------------------
-# Generate MCQs using OpenAI
+# Split the document into token-budgeted sections
 # ----------------------------------------------------------
-def generate_mcqs(
-    client: OpenAI,
-    source_text: str,
-    num_questions: int = 5,
-    difficulty: str = "medium",
-) -> List[Dict[str, Any]]:
+def _estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
 
-    if not source_text or not source_text.strip():
-        return []
 
-    prompt = _build_mcq_prompt(source_text, num_questions, difficulty)
+def split_into_sections(source_text: str, max_tokens: int = SECTION_MAX_TOKENS) -> List[str]:
+    """Pack paragraphs into sections of at most `max_tokens`; long paragraphs split by sentence."""
+    pieces = []
+    for paragraph in re.split(r"\n\s*\n", source_text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if _estimate_tokens(paragraph) <= max_tokens:
+            pieces.append(paragraph)
+        else:
+            pieces.extend(s for s in re.split(r"(?<=[.!?])\s+", paragraph) if s)
+
+    sections, current = [], ""
+    for piece in pieces:
+        if current and _estimate_tokens(current + piece) > max_tokens:
+            sections.append(current)
+            current = ""
+        current = f"{current}\n\n{piece}" if current else piece[: max_tokens * 4]
+
+    if current:
+        sections.append(current)
+    return sections
+
 
-    response = client.chat.completions.create(
+def allocate_questions(sections: List[str], num_questions: int) -> List[int]:
+    """
+    Spread questions over the document in proportion to content: question j
+    goes to the section holding the ((j + 0.5) / n)-th point of the text, so
+    every part of the document gets its share and big sections get more.
+    """
+    sizes = np.array([len(s) for s in sections], dtype=np.float64)
+    bounds = np.cumsum(sizes)
+    points = (np.arange(num_questions) + 0.5) / num_questions * bounds[-1]
+    owners = np.searchsorted(bounds, points, side="right")
+    return np.bincount(np.minimum(owners, len(sections) - 1), minlength=len(sections)).tolist()
+
+
+# ----------------------------------------------------------
+# Stream one section's questions
+# ----------------------------------------------------------
+def _generate_for_section(client: OpenAI, section_text: str, num_questions: int, difficulty: str,
+                          on_item=None) -> List[Dict[str, Any]]:
+    """Questions are parsed and validated one by one as the response streams in."""
+    prompt = _build_mcq_prompt(section_text, num_questions, difficulty)
+
+    mcqs = []
+    for mcq in stream_chat_objects(
+        client,
+        _normalize_mcq,
         model="gpt-4o-mini",
         temperature=0.4,
         messages=[
             {"role": "system", "content": "You generate high-quality MCQs."},
             {"role": "user", "content": prompt},
         ],
-    )
+    ):
+        mcqs.append(mcq)
+        if on_item:
+            on_item(mcq)
+
+    return mcqs
+
+
+# ----------------------------------------------------------
+# Near-duplicate removal (one embedding call, one matrix product)
+# ----------------------------------------------------------
+def _question_key(q: Dict[str, Any]) -> str:
+    correct = q["options"][ord(q["answer"]) - ord("A")]
+    return f"{q['question']} {correct}"
 
-    raw = response.choices[0].message.content
 
-    # Try clean direct JSON parse
+def drop_near_duplicates(client: OpenAI, mcqs: List[Dict[str, Any]],
+                         threshold: float = DUPLICATE_SIMILARITY) -> List[Dict[str, Any]]:
+    """Keep the first of every group of questions whose embeddings are nearly identical."""
+    if len(mcqs) < 2:
+        return mcqs
+
     try:
-        mcq_list = json.loads(raw)
-        if isinstance(mcq_list, list):
-            return _normalize_mcqs(mcq_list)
+        data = client.embeddings.create(
+            model="text-embedding-3-small",
+            input=[_question_key(q) for q in mcqs],
+        ).data
     except Exception:
-        pass
+        # Embeddings unavailable: fall back to exact (normalized) duplicates
+        seen, unique = set(), []
+        for q in mcqs:
+            key = " ".join(q["question"].lower().split())
+            if key not in seen:
+                seen.add(key)
+                unique.append(q)
+        return unique
+
+    vectors = np.array([d.embedding for d in data], dtype=np.float32)
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
 
-    # Attempt to extract JSON array from noisy output
-    match = re.search(r"\[.*\]", raw, flags=re.DOTALL)
-    if match:
-        try:
-            mcq_list = json.loads(match.group(0))
-            return _normalize_mcqs(mcq_list)
-        except Exception:
-            return []
+    # Pairs (i, j), i < j, that are too similar; j is dropped unless i already was
+    similar = np.triu(vectors @ vectors.T > threshold, k=1)
 
-    return []
+    keep = np.ones(len(mcqs), dtype=bool)
+    for i in np.flatnonzero(similar.any(axis=1)):
+        if keep[i]:
+            keep[similar[i]] = False
+
+    return [q for q, k in zip(mcqs, keep) if k]
+
+
+# ----------------------------------------------------------
+# Generate MCQs using OpenAI
+# ----------------------------------------------------------
+def generate_section_mcqs(client: OpenAI, sections: List[str], quotas: List[int],
+                          difficulty: str, max_in_flight: int = 16, on_item=None) -> Dict[int, List[Dict[str, Any]]]:
+    """
+    Generate `quotas[i]` (+ oversample) questions for every section with a
+    quota, concurrently, and drop near-duplicates across all of them.
+    Returns {section index: [mcq, ...]} in document order.
+
+    `on_item(section, mcq)` previews questions as they stream in (before
+    de-duplication); it is called on the caller's thread, so it may draw UI.
+    """
+    jobs = [(i, sections[i], n + OVERSAMPLE_PER_SECTION) for i, n in enumerate(quotas) if n]
+    arrivals = queue.Queue()
+
+    def run(job):
+        i, text, n = job
+        forward = (lambda mcq: arrivals.put((i, mcq))) if on_item else None
+        return _generate_for_section(client, text, n, difficulty, on_item=forward)
+
+    with ThreadPoolExecutor(max_workers=1) as runner:
+        future = runner.submit(map_bounded, run, jobs, max_in_flight=max_in_flight)
+        while on_item and not (future.done() and arrivals.empty()):
+            try:
+                on_item(*arrivals.get(timeout=0.05))
+            except queue.Empty:
+                pass
+        results = future.result()
+
+    tagged = [(i, q) for (i, _, _), qs in zip(jobs, results) for q in (qs or [])]
+    unique_ids = {id(q) for q in drop_near_duplicates(client, [q for _, q in tagged])}
+
+    by_section = {i: [] for i, _, _ in jobs}
+    for i, q in tagged:
+        if id(q) in unique_ids:
+            by_section[i].append(q)
+    return by_section
+
+
+def generate_mcqs(
+    client: OpenAI,
+    source_text: str,
+    num_questions: int = 5,
+    difficulty: str = "medium",
+    max_in_flight: int = 16,
+    on_item=None,
+) -> List[Dict[str, Any]]:
+    """
+    Questions cover the whole document: sections are generated concurrently
+    with questions allotted by content, then near-duplicates are removed.
+    `on_item(mcq)` sees each question as soon as it has streamed in.
+    """
+
+    if not source_text or not source_text.strip():
+        return []
+
+    sections = split_into_sections(source_text)
+
+    # Short documents: one call, as before
+    if len(sections) == 1:
+        return _generate_for_section(client, sections[0], num_questions, difficulty, on_item=on_item)
+
+    quotas = allocate_questions(sections, num_questions)
+    by_section = generate_section_mcqs(
+        client, sections, quotas, difficulty, max_in_flight=max_in_flight,
+        on_item=(lambda i, mcq: on_item(mcq)) if on_item else None,
+    )
+    tagged = [(i, q) for i, qs in sorted(by_section.items()) for q in qs]
+
+    # Trim the oversample: each section keeps its quota first, spare slots go in document order
+    taken = {i: 0 for i in range(len(sections))}
+    chosen, spare = [], []
+    for i, q in tagged:
+        if taken[i] < quotas[i]:
+            taken[i] += 1
+            chosen.append((i, q))
+        else:
+            spare.append((i, q))
+    chosen += spare[: max(0, num_questions - len(chosen))]
+    chosen.sort(key=lambda iq: iq[0])
+
+    return [q for _, q in chosen[:num_questions]]
 
 
 # ----------------------------------------------------------
 # Normalize + validate MCQ objects
 # ----------------------------------------------------------
+def _normalize_mcq(item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """One MCQ in canonical form, or None if it can't be used."""
+
+    q = str(item.get("question", "")).strip()
+    options = item.get("options", [])
+    answer = str(item.get("answer", "")).strip().upper()
+    explanation = str(item.get("explanation", "")).strip()
+
+    if not q or not isinstance(options, list) or len(options) != 4:
+        return None
+
+    # Fix answer if malformed
+    if answer not in ["A", "B", "C", "D"]:
+        if len(answer) > 0:
+            answer = answer[0]
+        if answer not in ["A", "B", "C", "D"]:
+            answer = "A"
+
+    return {
+        "question": q,
+        "options": options,
+        "answer": answer,
+        "explanation": explanation or "This answer is correct based on the passage.",
+    }
+
+
 def _normalize_mcqs(mcqs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
 
     cleaned = []
 
     for item in mcqs:
-        q = str(item.get("question", "")).strip()
-        options = item.get("options", [])
-        answer = str(item.get("answer", "")).strip().upper()
-        explanation = str(item.get("explanation", "")).strip()
-
-        if not q or len(options) != 4:
-            continue
-
-        # Fix answer if malformed
-        if answer not in ["A", "B", "C", "D"]:
-            if len(answer) > 0:
-                answer = answer[0]
-            if answer not in ["A", "B", "C", "D"]:
-                answer = "A"
-
-        cleaned.append(
-            {
-                "question": q,
-                "options": options,
-                "answer": answer,
-                "explanation": explanation or "This answer is correct based on the passage.",
-            }
-        )
+        mcq = _normalize_mcq(item) if isinstance(item, dict) else None
+        if mcq is not None:
+            cleaned.append(mcq)
 
     return cleaned
@@ -1,7 +1,7 @@
 import streamlit as st
 from openai import OpenAI
-from src.modules.curriculum.helpers import extract_text_from_file
-from src.modules.MCQ_Generator.mcq_generator import generate_mcqs
+from src.modules.curriculum.helpers import open_document
+from src.modules.MCQ_Generator.question_bank import get_question_bank
 
 
 def mcq_generator_tab(client: OpenAI):
@@ -23,17 +23,35 @@ def mcq_generator_tab(client: OpenAI):
         # Initialize session state for MCQs if not exists
         if "mcqs" not in st.session_state:
             st.session_state.mcqs = None
-        
-        text = extract_text_from_file(uploaded_file)
+
+        # Questions this session has already been given (the bank serves unused ones first)
+        if "seen_mcqs" not in st.session_state:
+            st.session_state.seen_mcqs = set()
+
+        # Cached per file content: answer clicks and slider moves never re-parse the PDF
+        document = open_document(uploaded_file)
+        st.caption(f"📄 {document.name} · {document.page_count} page(s)")
 
         if st.button("Generate MCQs", type="primary"):
+            # Questions appear here as they stream in; the quiz below replaces the preview
+            preview_slot = st.empty()
+            preview = preview_slot.container()
+            preview_count = [0]
+
+            def show_preview(mcq):
+                preview_count[0] += 1
+                preview.markdown(f"**Q{preview_count[0]}.** {mcq['question']}")
+
             with st.spinner("Generating questions..."):
-                mcqs = generate_mcqs(
-                    client=client,
-                    source_text=text,
+                mcqs, from_bank = get_question_bank(client).get_quiz(
+                    doc_hash=document.content_hash,
+                    source_text=document.text(),
                     num_questions=num_questions,
                     difficulty=difficulty,
+                    seen=st.session_state.seen_mcqs,
+                    on_item=show_preview,
                 )
+            preview_slot.empty()
 
             if not mcqs:
                 st.error("Could not generate MCQs. Try another document.")
@@ -42,6 +60,8 @@ def mcq_generator_tab(client: OpenAI):
 
             st.session_state.mcqs = mcqs
             st.success(f"Generated {len(mcqs)} questions!")
+            if from_bank:
+                st.caption(f"⚡ {from_bank} of {len(mcqs)} loaded from the question bank")
 
         # ---------------------------
         # Display MCQs (from session state)
@@ -0,0 +1,156 @@
+"""
+Persistent MCQ bank keyed by (document hash, section, difficulty)
+"""
+import os
+import threading
+from collections import OrderedDict
+import streamlit as st
+
+from src.services.content_bank import ContentBank
+from src.modules.MCQ_Generator.mcq_generator import (
+    split_into_sections,
+    allocate_questions,
+    generate_section_mcqs,
+)
+from src.utils.paths import DATA_DIR
+
+QUESTION_BANK_PATH = os.path.join(DATA_DIR, "question_bank.json")
+
+# A document counts as popular (and gets topped up in the background) after this many quizzes
+POPULAR_AFTER = 2
+
+# Questions generated per background top-up call
+TOPUP_BATCH = 3
+
+# Documents whose section texts stay in memory for top-ups (least recently quizzed go first);
+# an evicted document's questions are dropped from the bank too
+MAX_CACHED_DOCUMENTS = 32
+
+# Stored (document, section, difficulty) buckets across all documents, least recently used go first
+MAX_BANK_BUCKETS = 1024
+
+
+def _mcq_identity(mcq) -> str:
+    return " ".join(str(mcq.get("question", "")).lower().split())
+
+
+class QuestionBank:
+    """
+    Serves quizzes from stored questions; only the shortfall is generated live.
+
+    Section texts of the last MAX_CACHED_DOCUMENTS documents quizzed are
+    kept in memory so the background refiller can top up popular documents;
+    a document that falls out of that cache leaves the bank with it.
+    """
+
+    def __init__(self, client, path: str = QUESTION_BANK_PATH):
+        self.client = client
+        self._sections = OrderedDict()   # doc hash -> [section text], LRU
+        self._requests = {}      # doc hash -> number of quizzes served
+        self._bank_keys = {}     # doc hash -> bank keys used for it
+        self._lock = threading.Lock()
+
+        self.bank = ContentBank(
+            path=path,
+            generate=self._topup,
+            identity=_mcq_identity,
+            low_watermark=3,
+            target=6,
+            max_size=50,
+            max_buckets=MAX_BANK_BUCKETS,
+        )
+
+    @staticmethod
+    def _key(doc_hash: str, section: int, difficulty: str):
+        return (doc_hash[:16], section, difficulty)
+
+    def _topup(self, key) -> list:
+        doc_key, section, difficulty = key
+        with self._lock:
+            sections = self._sections.get(doc_key)
+        if not sections:
+            # Source text is gone (evicted or from a previous run): nothing to top up from
+            self.bank.untrack(key)
+            return []
+
+        quotas = [0] * len(sections)
+        quotas[section] = TOPUP_BATCH
+        return generate_section_mcqs(self.client, sections, quotas, difficulty).get(section, [])
+
+    def get_quiz(self, doc_hash: str, source_text: str, num_questions: int,
+                 difficulty: str = "medium", seen: set = None, on_item=None):
+        """
+        Returns (mcqs, served_from_bank). Unused questions (not in `seen`) are
+        sampled per section first; sections that come up short are generated
+        live in one concurrent round, stored, and served from the new batch.
+        `on_item(mcq)` previews banked questions at once and live ones as they stream.
+        """
+        seen = seen if seen is not None else set()
+        if not source_text or not source_text.strip():
+            return [], 0
+
+        doc_key = doc_hash[:16]
+        with self._lock:
+            sections = self._sections.get(doc_key)
+            if sections is not None:
+                self._sections.move_to_end(doc_key)
+            self._requests[doc_key] = self._requests.get(doc_key, 0) + 1
+            popular = self._requests[doc_key] >= POPULAR_AFTER
+
+        if sections is None:
+            sections = split_into_sections(source_text)
+            evicted = []
+            with self._lock:
+                self._sections[doc_key] = sections
+                self._sections.move_to_end(doc_key)
+                while len(self._sections) > MAX_CACHED_DOCUMENTS:
+                    old_key, _ = self._sections.popitem(last=False)
+                    self._requests.pop(old_key, None)
+                    evicted.extend(self._bank_keys.pop(old_key, ()))
+            self.bank.drop(evicted)
+
+        quotas = allocate_questions(sections, num_questions)
+        with self._lock:
+            self._bank_keys.setdefault(doc_key, set()).update(
+                self._key(doc_hash, i, difficulty) for i, n in enumerate(quotas) if n
+            )
+
+        picked = {}
+        shortfall = [0] * len(sections)
+        for i, n in enumerate(quotas):
+            if not n:
+                continue
+            picked[i] = self.bank.take(self._key(doc_hash, i, difficulty), seen=seen, k=n)
+            shortfall[i] = n - len(picked[i])
+
+        served_from_bank = sum(len(qs) for qs in picked.values())
+        if on_item:
+            for i in sorted(picked):
+                for q in picked[i]:
+                    on_item(q)
+
+        if any(shortfall):
+            fresh = generate_section_mcqs(
+                self.client, sections, shortfall, difficulty,
+                on_item=(lambda i, mcq: on_item(mcq)) if on_item else None,
+            )
+            for i, qs in fresh.items():
+                key = self._key(doc_hash, i, difficulty)
+                self.bank.add(key, qs)
+                unused = [q for q in qs if _mcq_identity(q) not in seen]
+                picked[i] += unused[: shortfall[i]]
+                seen.update(_mcq_identity(q) for q in unused[: shortfall[i]])
+
+        if popular:
+            for i in picked:
+                self.bank.track(self._key(doc_hash, i, difficulty))
+
+        return [q for i in sorted(picked) for q in picked[i]], served_from_bank
+
+
+@st.cache_resource
+def get_question_bank(_client):
+    """Process-wide question bank, topped up in the background."""
+    question_bank = QuestionBank(_client)
+    question_bank.bank.start_refiller()
+    return question_bank
@@ -0,0 +1,243 @@
+"""
+Batch quiz production - many variants of one reading for a whole class
+"""
+import os
+import re
+import csv
+import json
+import math
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any
+
+from openai import OpenAI
+
+from src.modules.MCQ_Generator.mcq_generator import (
+    split_into_sections,
+    allocate_questions,
+    drop_near_duplicates,
+    _generate_for_section,
+)
+from src.utils.concurrency import RateLimiter
+
+# Questions requested per LLM call
+QUESTIONS_PER_CALL = 10
+
+# Shared by every quiz set in the process, so parallel jobs don't add up past the limits
+_SCHEDULER = RateLimiter(max_in_flight=8, requests_per_minute=400)
+
+_OPTION_LABEL = re.compile(r"^\s*[A-Da-d][).:]\s*")
+CSV_FIELDS = ["quiz", "number", "question", "A", "B", "C", "D", "answer", "explanation"]
+
+
+# ============================================================
+# 🧮 PLANNING
+# ============================================================
+def plan_pool_size(variants: int, per_quiz: int, max_reuse: int) -> int:
+    """Distinct questions needed when each may appear in at most `max_reuse` quizzes."""
+    return max(per_quiz, math.ceil(variants * per_quiz / max(1, max_reuse)))
+
+
+def _plan_jobs(sections: List[str], pool_size: int) -> list:
+    """(section index, count) requests, at most QUESTIONS_PER_CALL each."""
+    jobs = []
+    for i, quota in enumerate(allocate_questions(sections, pool_size)):
+        while quota > 0:
+            n = min(quota, QUESTIONS_PER_CALL)
+            jobs.append((i, n))
+            quota -= n
+    return jobs
+
+
+# ============================================================
+# 🏭 POOL GENERATION
+# ============================================================
+def _generate_pool(client, sections, pool_size, difficulty, scheduler,
+                   generate=_generate_for_section, on_batch=None) -> list:
+    """Returns [(section index, mcq)], generated under the shared scheduler."""
+    jobs = _plan_jobs(sections, pool_size)
+    tagged = []
+
+    with ThreadPoolExecutor(max_workers=max(1, min(len(jobs), scheduler.max_in_flight))) as pool:
+        futures = {
+            pool.submit(scheduler.call, generate, client, sections[i], n, difficulty): i
+            for i, n in jobs
+        }
+        for future in as_completed(futures):
+            try:
+                batch = [(futures[future], q) for q in future.result()]
+            except Exception as e:
+                print("Quiz set generation error:", e)
+                continue
+            tagged.extend(batch)
+            if on_batch:
+                on_batch(batch)
+
+    return tagged
+
+
+# ============================================================
+# 🧩 ASSEMBLY
+# ============================================================
+def _shuffle_options(mcq: Dict[str, Any], rng: random.Random) -> Dict[str, Any]:
+    """Same question with options in a new order, relabelled A-D."""
+    texts = [_OPTION_LABEL.sub("", str(o)) for o in mcq["options"]]
+    correct = texts[ord(mcq["answer"]) - ord("A")]
+    rng.shuffle(texts)
+
+    letters = "ABCD"
+    return {
+        **mcq,
+        "options": [f"{letters[k]}) {t}" for k, t in enumerate(texts)],
+        "answer": letters[texts.index(correct)],
+    }
+
+
+def assemble_variants(pool: list, variants: int, per_quiz: int, max_reuse: int, seed: int = 0) -> list:
+    """
+    Build `variants` quizzes of `per_quiz` distinct questions from the pool
+    [(section, mcq)]. Least-used questions are picked first (so reuse is
+    spread evenly and never exceeds `max_reuse`); each quiz keeps document
+    order and gets its own option order.
+    """
+    rng = random.Random(seed)
+    uses = [0] * len(pool)
+    quizzes = []
+
+    for _ in range(variants):
+        candidates = [k for k in range(len(pool)) if uses[k] < max_reuse]
+        if len(candidates) < per_quiz:
+            break
+
+        rng.shuffle(candidates)
+        candidates.sort(key=lambda k: uses[k])      # stable: random among equals
+        chosen = sorted(candidates[:per_quiz], key=lambda k: (pool[k][0], k))
+
+        for k in chosen:
+            uses[k] += 1
+        quizzes.append([_shuffle_options(pool[k][1], rng) for k in chosen])
+
+    return quizzes
+
+
+# ============================================================
+# 💾 OUTPUT
+# ============================================================
+class _QuizSetWriter:
+    """Writes the de-duplicated pool (questions.jsonl) and each quiz as it is assembled."""
+
+    def __init__(self, out_dir: str):
+        self.out_dir = out_dir
+        os.makedirs(out_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._csv_file = open(os.path.join(out_dir, "quiz_set.csv"), "w", encoding="utf-8", newline="")
+        self._csv = csv.DictWriter(self._csv_file, fieldnames=CSV_FIELDS)
+        self._csv.writeheader()
+
+    def pool(self, tagged):
+        with open(os.path.join(self.out_dir, "questions.jsonl"), "w", encoding="utf-8") as f:
+            for section, mcq in tagged:
+                f.write(json.dumps({"section": section, **mcq}, ensure_ascii=False) + "\n")
+
+    def quiz(self, number: int, mcqs: list):
+        path = os.path.join(self.out_dir, f"quiz_{number:03d}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"quiz": number, "questions": mcqs}, f, ensure_ascii=False, indent=2)
+
+        with self._lock:
+            for n, q in enumerate(mcqs, start=1):
+                row = {"quiz": number, "number": n, "question": q["question"],
+                       "answer": q["answer"], "explanation": q["explanation"]}
+                row.update({letter: option for letter, option in zip("ABCD", q["options"])})
+                self._csv.writerow(row)
+            self._csv_file.flush()
+
+    def close(self):
+        self._csv_file.close()
+
+
+# ============================================================
+# 🚀 PUBLIC API
+# ============================================================
+def generate_quiz_set(
+    client: OpenAI,
+    document,
+    variants: int,
+    per_quiz: int = 10,
+    difficulty: str = "medium",
+    max_reuse: int = 3,
+    out_dir: str = None,
+    scheduler: RateLimiter = None,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """
+    Produce `variants` quizzes of `per_quiz` questions from one document
+    (text, or a LazyDocument from open_document).
+
+    The question budget is planned up front: each question may appear in up
+    to `max_reuse` quizzes, so only variants * per_quiz / max_reuse distinct
+    questions are generated, spread over the document's sections and sent
+    through the shared rate-limited scheduler in parallel. With `out_dir`,
+    the de-duplicated question pool and the finished quizzes are written
+    (questions.jsonl, quiz_NNN.json, quiz_set.csv).
+    """
+    start = time.time()
+    text = document.text() if hasattr(document, "text") else str(document)
+    scheduler = scheduler or _SCHEDULER
+
+    if not text.strip() or variants < 1 or per_quiz < 1:
+        return {"quizzes": [], "pool_size": 0, "seconds": 0.0}
+
+    sections = split_into_sections(text)
+    target = plan_pool_size(variants, per_quiz, max_reuse)
+    writer = _QuizSetWriter(out_dir) if out_dir else None
+
+    # Counted per job: the scheduler's own counter is shared with every other job
+    llm_calls = 0
+    calls_lock = threading.Lock()
+
+    def generate(*args):
+        nonlocal llm_calls
+        with calls_lock:
+            llm_calls += 1
+        return _generate_for_section(*args)
+
+    try:
+        pool = []
+        # A second round covers questions lost to parse failures or de-duplication
+        for _ in range(2):
+            missing = target - len(pool)
+            if missing <= 0:
+                break
+
+            pool += _generate_pool(
+                client, sections, missing, difficulty, scheduler, generate=generate,
+            )
+            unique = {id(q) for q in drop_near_duplicates(client, [q for _, q in pool])}
+            pool = [(i, q) for i, q in pool if id(q) in unique]
+
+        quizzes = assemble_variants(pool, variants, per_quiz, max_reuse, seed=seed)
+
+        if writer:
+            writer.pool(pool)
+            for number, mcqs in enumerate(quizzes, start=1):
+                writer.quiz(number, mcqs)
+    finally:
+        if writer:
+            writer.close()
+
+    summary = {
+        "quizzes": quizzes,
+        "pool_size": len(pool),
+        "planned_pool_size": target,
+        "variants_built": len(quizzes),
+        "llm_calls": llm_calls,
+        "seconds": round(time.time() - start, 2),
+    }
+    if out_dir:
+        with open(os.path.join(out_dir, "summary.json"), "w", encoding="utf-8") as f:
+            json.dump({k: v for k, v in summary.items() if k != "quizzes"}, f, indent=2)
+
+    return summary
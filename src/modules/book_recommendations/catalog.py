@@ -0,0 +1,413 @@
+"""
+Local book catalog: validated recommendations + the novels library, searchable offline
+"""
+import os
+import re
+import json
+import math
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple, List, Dict, Any, NamedTuple
+
+import numpy as np
+import streamlit as st
+
+from src.utils.paths import DATA_DIR
+
+CATALOG_PATH = os.path.join(DATA_DIR, "book_catalog.db")
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+# A catalog book is a match when 0.75 * cosine + 0.25 * keyword overlap reaches this
+# (tuned for text-embedding-3-small; keyword-only matching, used when embeddings fail, needs KEYWORD_ONLY_MIN)
+MIN_MATCH_SCORE = 0.42
+KEYWORD_ONLY_MIN = 0.6
+
+# Library books carry an excerpt as their description
+LIBRARY_EXCERPT_CHARS = 2000
+
+# Reader ages for the novels library. Only books for Luffy's readers (overlapping
+# DEFAULT_READER_AGES) are indexed; the rest would never be served, so they aren't read or embedded
+LIBRARY_AGE_RANGES = {
+    "The Lost Symbol": "Adult",
+    "Halo - The Fall Of Reach": "Adult",
+}
+
+# Luffy's readers are children: a request that names no age is matched as this range
+DEFAULT_READER_AGES = (5, 17)
+
+# Request embeddings kept in memory (repeat requests don't call the API again)
+QUERY_CACHE_SIZE = 512
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "to", "in", "on", "for", "with", "who", "that",
+    "is", "are", "be", "it", "its", "my", "me", "i", "want", "like", "likes", "some",
+    "book", "books", "about", "year", "years", "old", "age", "ages", "kid", "kids", "read",
+}
+
+# Words that stand for an age range, in requests and in catalog entries
+_AGE_WORDS = {
+    "toddler": (1, 3), "preschool": (3, 5), "kindergarten": (5, 6),
+    "middle grade": (8, 12), "tween": (10, 12), "teen": (13, 17),
+    "young adult": (14, 18), "ya": (14, 18), "adult": (18, 99),
+}
+
+
+# ============================================================
+# 🎂 AGE RANGES
+# ============================================================
+def _age_from_words(text: str) -> Optional[Tuple[int, int]]:
+    for phrase, ages in _AGE_WORDS.items():
+        if re.search(rf"\b{phrase}s?\b", text):
+            return ages
+    return None
+
+
+def request_age_range(text: str) -> Optional[Tuple[int, int]]:
+    """(youngest, oldest) reader age a request asks for, or None."""
+    text = str(text).lower()
+    match = re.search(r"\bages?\s*(\d{1,2})\s*(?:-|–|to)\s*(\d{1,2})\b", text)
+    if match:
+        return int(match.group(1)), int(match.group(2))
+    match = re.search(r"\b(\d{1,2})\s*-?\s*(?:years?|yrs?)\s*-?\s*old\b|\bages?\s*(\d{1,2})\b", text)
+    if match:
+        age = int(match.group(1) or match.group(2))
+        return age, age
+    match = re.search(r"\b(\d{1,2})(?:st|nd|rd|th)?\s*grade\b|\bgrade\s*(\d{1,2})\b", text)
+    if match:
+        grade = int(match.group(1) or match.group(2))
+        return grade + 5, grade + 6
+    return _age_from_words(text)
+
+
+def book_age_range(age_range: str) -> Optional[Tuple[int, int]]:
+    """(youngest, oldest) from a catalog age range like "8-12", "Ages 9+" or "Young adult"."""
+    text = str(age_range).lower()
+    match = re.search(r"(\d{1,2})\s*(?:-|–|to)\s*(\d{1,2})", text)
+    if match:
+        return int(match.group(1)), int(match.group(2))
+    match = re.search(r"(\d{1,2})\s*(?:\+|and up|and older)", text)
+    if match:
+        return int(match.group(1)), 99
+    match = re.search(r"\d{1,2}", text)
+    if match:
+        return int(match.group(0)), int(match.group(0)) + 2
+    return _age_from_words(text)
+
+
+def ages_overlap(requested, book) -> bool:
+    return requested[0] <= book[1] and book[0] <= requested[1]
+
+
+# ============================================================
+# 📚 CATALOG
+# ============================================================
+def _key(title: str, author: str) -> str:
+    main = re.split(r"[:(]", str(title))[0]
+    return " ".join(_TOKEN.findall(main.lower())) + "|" + " ".join(_TOKEN.findall(str(author).lower()))
+
+
+def _tokens(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall(str(text).lower()) if t not in _STOPWORDS and len(t) > 1]
+
+
+def _index_text(book: Dict[str, Any]) -> str:
+    return " ".join([
+        book.get("title", ""), book.get("author", ""),
+        " ".join(book.get("themes") or []), book.get("description") or book.get("reason", ""),
+    ])
+
+
+class _Index(NamedTuple):
+    keys: List[str]
+    books: List[Dict[str, Any]]
+    vectors: np.ndarray
+    postings: Dict[str, set]
+    ages: List[Optional[Tuple[int, int]]]
+
+
+class BookCatalog:
+    """
+    Books (title, author, age range, themes, description, cover, buy link) in
+    SQLite, with an in-memory vector index (embeddings stored alongside) and
+    a keyword index over the same text. Searched before any LLM or web call.
+    """
+
+    FIELDS = ["title", "author", "age_range", "themes", "description", "reason",
+              "cover_image", "buy_link", "retailer", "source"]
+
+    def __init__(self, client, path: str = CATALOG_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.client = client
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._queries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.embedded_queries = 0
+
+        with self._lock:
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS books (
+                    key TEXT PRIMARY KEY,
+                    book TEXT,
+                    embedding BLOB,
+                    added REAL
+                )
+                """
+            )
+            self.conn.commit()
+        self._load()
+
+    # -------------------------------------------------------
+    def _load(self):
+        """Rebuild the in-memory indexes from the database and swap them in at once."""
+        with self._lock:
+            rows = self.conn.execute("SELECT key, book, embedding FROM books ORDER BY added").fetchall()
+
+        books = [json.loads(book) for _, book, _ in rows]
+
+        dim = next((len(e) // 4 for _, _, e in rows if e), 0)
+        vectors = np.zeros((len(rows), dim), dtype=np.float32)
+        for i, (_, _, blob) in enumerate(rows):
+            if blob and len(blob) == dim * 4:
+                vectors[i] = np.frombuffer(blob, dtype=np.float32)
+        if dim:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.where(norms == 0, 1, norms)
+
+        postings = {}
+        for i, book in enumerate(books):
+            for token in set(_tokens(_index_text(book))):
+                postings.setdefault(token, set()).add(i)
+
+        index = _Index(
+            keys=[key for key, _, _ in rows],
+            books=books,
+            vectors=vectors,
+            postings=postings,
+            ages=[book_age_range(b.get("age_range", "")) for b in books],
+        )
+        with self._lock:
+            self._index = index
+
+    def _snapshot(self) -> _Index:
+        """The current indexes, consistent with each other even while `_load` runs."""
+        with self._lock:
+            return self._index
+
+    @property
+    def books(self) -> List[Dict[str, Any]]:
+        return self._snapshot().books
+
+    def _embed(self, texts: List[str]) -> Optional[np.ndarray]:
+        if not texts or self.client is None:
+            return None
+        try:
+            data = self.client.embeddings.create(model=EMBEDDING_MODEL, input=texts).data
+        except Exception as e:
+            print("Catalog embedding error:", e)
+            return None
+        return np.array([d.embedding for d in data], dtype=np.float32)
+
+    def _embed_query(self, request: str) -> Optional[np.ndarray]:
+        """Normalized embedding of a request, cached by its wording."""
+        key = " ".join(_TOKEN.findall(str(request).lower()))
+        with self._lock:
+            if key in self._queries:
+                self._queries.move_to_end(key)
+                return self._queries[key]
+
+        query = self._embed([request])
+        if query is None:
+            return None
+        q = query[0] / (np.linalg.norm(query[0]) or 1.0)
+
+        with self._lock:
+            self.embedded_queries += 1
+            self._queries[key] = q
+            while len(self._queries) > QUERY_CACHE_SIZE:
+                self._queries.popitem(last=False)
+        return q
+
+    def __len__(self):
+        return len(self.books)
+
+    # -------------------------------------------------------
+    def add_books(self, books: List[Dict[str, Any]], source: str = "search") -> int:
+        """Store validated books (one embedding call for the batch); known books are updated."""
+        books = [b for b in books if isinstance(b, dict) and b.get("title")]
+        if not books:
+            return 0
+
+        entries = [
+            {**{f: b.get(f) for f in self.FIELDS if b.get(f)}, "source": b.get("source") or source}
+            for b in books
+        ]
+        vectors = self._embed([_index_text(e) for e in entries])
+        now = time.time()
+
+        with self._lock:
+            for i, entry in enumerate(entries):
+                blob = vectors[i].tobytes() if vectors is not None else None
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO books VALUES (?,?,?,?)",
+                    (_key(entry["title"], entry.get("author", "")), json.dumps(entry, ensure_ascii=False), blob, now),
+                )
+            self.conn.commit()
+
+        self._load()
+        return len(entries)
+
+    def add_library(self, novels: Dict[str, str], text_for, age_ranges: Dict[str, str] = None) -> int:
+        """
+        Add library books not yet in the catalog; `text_for(path)` returns a
+        book's text. Only books whose range in `age_ranges` overlaps
+        DEFAULT_READER_AGES are added: the catalog never serves the others.
+        """
+        age_ranges = LIBRARY_AGE_RANGES if age_ranges is None else age_ranges
+        known = set(self._snapshot().keys)
+        new = []
+        for title, path in novels.items():
+            ages = book_age_range(age_ranges.get(title, ""))
+            if _key(title, "") in known or not (ages and ages_overlap(DEFAULT_READER_AGES, ages)):
+                continue
+            try:
+                text = text_for(path)
+            except Exception as e:
+                print(f"Catalog could not read {path}: {e}")
+                continue
+            # Skip front matter (title page, copyright) for a more representative excerpt
+            start = len(text) // 20
+            excerpt = " ".join(text[start:start + LIBRARY_EXCERPT_CHARS].split())
+            new.append({
+                "title": title,
+                "author": "",
+                "age_range": age_ranges.get(title, ""),
+                "description": excerpt,
+                "reason": "In our reading library — open it in Ask The Book to read along with Luffy.",
+                "source": "library",
+            })
+        return self.add_books(new, source="library")
+
+    # -------------------------------------------------------
+    @staticmethod
+    def _keyword_scores(index: _Index, query: str) -> np.ndarray:
+        scores = np.zeros(len(index.books))
+        tokens = set(_tokens(query))
+        if not tokens or not index.books:
+            return scores
+
+        total = 0.0
+        for token in tokens:
+            postings = index.postings.get(token, ())
+            idf = math.log((1 + len(index.books)) / (1 + len(postings))) + 1
+            total += idf
+            for i in postings:
+                scores[i] += idf
+        return scores / total
+
+    @staticmethod
+    def _ranked(index: _Index, scores: np.ndarray, threshold: float, requested, k: int) -> list:
+        found = []
+        for i in np.argsort(-scores):
+            if scores[i] < threshold or len(found) == k:
+                break
+            # Every catalog hit needs a known age range that fits the reader
+            if not (index.ages[i] and ages_overlap(requested, index.ages[i])):
+                continue
+            found.append({**index.books[i], "match": round(float(scores[i]), 3)})
+        return found
+
+    def search(self, request: str, k: int = 5) -> List[Dict[str, Any]]:
+        """
+        Up to `k` catalog books matching the request, best first: similarity
+        (embedding + keywords) above the match threshold, within the
+        request's age range (DEFAULT_READER_AGES when it names none).
+
+        Keyword matching runs first; the request is only embedded when
+        keywords alone don't find `k` books.
+        """
+        index = self._snapshot()
+        if not index.books:
+            return []
+
+        requested = request_age_range(request) or DEFAULT_READER_AGES
+        keyword = self._keyword_scores(index, request)
+        found = self._ranked(index, keyword, KEYWORD_ONLY_MIN, requested, k)
+
+        if len(found) < k and index.vectors.shape[1]:
+            q = self._embed_query(request)
+            if q is not None and q.shape[0] == index.vectors.shape[1]:
+                scores = 0.75 * (index.vectors @ q) + 0.25 * keyword
+                found = self._ranked(index, scores, MIN_MATCH_SCORE, requested, k)
+
+        self.hits += len(found)
+        self.misses += k - len(found)
+        return found
+
+    def stats(self) -> dict:
+        sources = {}
+        for book in self.books:
+            sources[book.get("source", "search")] = sources.get(book.get("source", "search"), 0) + 1
+        return {"books": len(self.books), "by_source": sources, "hits": self.hits, "misses": self.misses,
+                "embedded_queries": self.embedded_queries}
+
+
+# ============================================================
+# 🔁 CATALOG FIRST, ENGINE FOR THE GAPS
+# ============================================================
+def recommend_with_catalog(catalog: BookCatalog, request: str, engine, k: int = 5):
+    """
+    Returns (books, from_catalog). Catalog matches are served first; only
+    when there are fewer than `k` does `engine(request, n, exclude)` run, and
+    the new books it validates are added to the catalog. If the engine
+    fails, any catalog matches are still returned.
+    """
+    found = catalog.search(request, k=k)
+    if len(found) >= k:
+        return found, len(found)
+
+    try:
+        fresh = engine(request, k - len(found), [b["title"] for b in found]) or []
+    except Exception:
+        if found:
+            return found, len(found)
+        raise
+
+    known = {_key(b["title"], b.get("author", "")) for b in found}
+    fresh = [b for b in fresh if isinstance(b, dict) and b.get("title")
+             and _key(b["title"], b.get("author", "")) not in known]
+
+    try:
+        catalog.add_books(fresh)
+    except Exception as e:
+        print("Catalog update error:", e)
+    return found + fresh[: k - len(found)], len(found)
+
+
+def _seed_library(catalog: BookCatalog):
+    from src.modules.vocabulary_builder.corpus import list_novels, book_text
+
+    try:
+        added = catalog.add_library(list_novels(), book_text)
+    except Exception as e:
+        print("Catalog library seeding error:", e)
+        return
+    if added:
+        print(f"Catalog: added {added} library books")
+
+
+@st.cache_resource(show_spinner="Opening Luffy's book catalog…")
+def get_catalog(_client) -> BookCatalog:
+    """
+    Process-wide catalog. The novels library is added by a background
+    thread, so the first search doesn't wait for books to be read and
+    embedded; library books become searchable once the thread is done.
+    """
+    catalog = BookCatalog(_client)
+    threading.Thread(target=_seed_library, args=(catalog,), name="catalog-library", daemon=True).start()
+    return catalog
@@ -0,0 +1,179 @@
+"""
+Cover-image proxy: fetch each cover once, validate it, keep a local thumbnail
+"""
+import os
+import time
+import socket
+import hashlib
+import tempfile
+import ipaddress
+import urllib.request
+from io import BytesIO
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict
+
+import streamlit as st
+
+from src.services.disk_cache import DiskCache
+from src.utils.paths import DATA_DIR
+
+COVER_CACHE_DIR = os.path.join(DATA_DIR, "cover_cache")
+
+# Twice the 160 px display width, for sharp covers on high-DPI screens
+THUMBNAIL_SIZE = (320, 480)
+THUMBNAIL_QUALITY = 85
+
+MAX_DOWNLOAD_BYTES = 8 * 1024 * 1024
+FETCH_TIMEOUT = 6.0
+
+# Broken URLs are remembered for a day before being tried again
+FAILED_RETRY_AFTER = 86400
+
+# Tiny images are tracking pixels or placeholders, not covers
+MIN_COVER_SIDE = 40
+
+_HEADERS = {"User-Agent": "Mozilla/5.0 (LuffyLearning cover fetcher)", "Accept": "image/*"}
+
+
+# ============================================================
+# 🛡️ PUBLIC HOSTS ONLY (URLs come from LLM and search output)
+# ============================================================
+def is_public_url(url: str) -> bool:
+    """http(s) URL whose host resolves only to public internet addresses."""
+    parsed = urlparse(str(url))
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        return False
+    try:
+        infos = socket.getaddrinfo(parsed.hostname, parsed.port or None, proto=socket.IPPROTO_TCP)
+    except (socket.gaierror, UnicodeError, ValueError):
+        return False
+    addresses = {ipaddress.ip_address(info[4][0].split("%")[0]) for info in infos}
+    return bool(addresses) and all(a.is_global and not a.is_multicast for a in addresses)
+
+
+class _PublicRedirectHandler(urllib.request.HTTPRedirectHandler):
+    """Follows a redirect only if its target is a public host too (unless private hosts are allowed)."""
+
+    def __init__(self, allow_private_hosts: bool = False):
+        super().__init__()
+        self.allow_private_hosts = allow_private_hosts
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        if not self.allow_private_hosts and not is_public_url(newurl):
+            raise ValueError(f"redirect to a non-public address: {newurl}")
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+class CoverCache:
+    """
+    URL -> validated JPEG thumbnail. Thumbnails are stored by the SHA-256 of
+    the original image (the same cover from two URLs is stored once); a small
+    index maps each URL to its digest, or records that it failed.
+
+    Only public hosts are fetched; `allow_private_hosts` lifts that for
+    trusted setups (a LAN image server, local tests).
+    """
+
+    def __init__(self, cache_dir: str = COVER_CACHE_DIR, max_workers: int = 8,
+                 allow_private_hosts: bool = False):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.allow_private_hosts = allow_private_hosts
+        self._opener = urllib.request.build_opener(_PublicRedirectHandler(allow_private_hosts))
+        self.index = DiskCache(os.path.join(cache_dir, "index.db"), ttl=30 * 86400, max_entries=20000)
+        self.fetched = 0
+        self.failed = 0
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, f"{digest}.jpg")
+
+    # -------------------------------------------------------
+    def _download(self, url: str) -> bytes:
+        if not self.allow_private_hosts and not is_public_url(url):
+            raise ValueError("not a public address")
+        request = urllib.request.Request(url, headers=_HEADERS)
+        with self._opener.open(request, timeout=FETCH_TIMEOUT) as response:
+            data = response.read(MAX_DOWNLOAD_BYTES + 1)
+        if len(data) > MAX_DOWNLOAD_BYTES:
+            raise ValueError("image too large")
+        return data
+
+    @staticmethod
+    def _thumbnail(data: bytes) -> bytes:
+        """Validated, downscaled JPEG; raises if `data` isn't a usable image."""
+        from PIL import Image
+
+        Image.open(BytesIO(data)).verify()          # integrity check (consumes the image)
+        image = Image.open(BytesIO(data))
+        if min(image.size) < MIN_COVER_SIDE:
+            raise ValueError(f"image too small: {image.size}")
+
+        image = image.convert("RGB")
+        image.thumbnail(THUMBNAIL_SIZE)
+        out = BytesIO()
+        image.save(out, format="JPEG", quality=THUMBNAIL_QUALITY, optimize=True)
+        return out.getvalue()
+
+    def _store(self, digest: str, thumb: bytes):
+        path = self._path(digest)
+        if os.path.exists(path):
+            return
+        # A unique temp file per call: threads of one get_many batch may store the same digest
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(thumb)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    # -------------------------------------------------------
+    def get(self, url: str) -> Optional[bytes]:
+        """Thumbnail bytes for `url`, fetching it on first use; None if it's broken."""
+        if not url or not str(url).startswith(("http://", "https://")):
+            return None
+
+        entry = self.index.get(url)
+        if entry:
+            if entry.get("digest") and os.path.exists(self._path(entry["digest"])):
+                with open(self._path(entry["digest"]), "rb") as f:
+                    return f.read()
+            if not entry.get("digest") and time.time() - entry.get("failed", 0) < FAILED_RETRY_AFTER:
+                return None
+
+        try:
+            data = self._download(url)
+            digest = hashlib.sha256(data).hexdigest()
+            if not os.path.exists(self._path(digest)):
+                self._store(digest, self._thumbnail(data))
+        except Exception as e:
+            print(f"Cover fetch failed for {url}: {e}")
+            self.failed += 1
+            self.index.set(url, {"digest": None, "failed": time.time()})
+            return None
+
+        self.fetched += 1
+        self.index.set(url, {"digest": digest})
+        with open(self._path(digest), "rb") as f:
+            return f.read()
+
+    def get_many(self, urls) -> Dict[str, Optional[bytes]]:
+        """Thumbnails for several URLs, fetched in parallel."""
+        urls = list(dict.fromkeys(u for u in urls if u))
+        if not urls:
+            return {}
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(urls)))) as pool:
+            return dict(zip(urls, pool.map(self.get, urls)))
+
+    def stats(self) -> dict:
+        return {"fetched": self.fetched, "failed": self.failed, "index": self.index.stats()}
+
+
+@st.cache_resource
+def get_cover_cache() -> CoverCache:
+    """Process-wide cover cache."""
+    return CoverCache()
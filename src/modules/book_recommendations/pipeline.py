@@ -0,0 +1,272 @@
+"""
+Fixed-stage recommendation pipeline: one LLM call, one parallel search round
+"""
+import re
+import threading
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any
+
+import streamlit as st
+
+from src.modules.book_recommendations.recommender import (
+    cached_search,
+    default_search_tool,
+    get_search_cache,
+    get_results_cache,
+    normalize_request,
+)
+from src.modules.book_recommendations.covers import CoverCache, get_cover_cache
+from src.services.disk_cache import DiskCache
+from src.utils.json_stream import stream_chat_objects
+
+# Candidates asked for beyond the books shown, to cover ones that fail validation
+EXTRA_CANDIDATES = 3
+
+# Image URLs tried per book before giving up on a cover
+MAX_COVER_TRIES = 3
+
+# Retailer host fragments, in order of preference
+RETAILERS = {
+    "amazon.": "Amazon",
+    "barnesandnoble.com": "Barnes & Noble",
+    "bookshop.org": "Bookshop.org",
+    "indiebound.org": "IndieBound",
+    "target.com": "Target",
+    "walmart.com": "Walmart",
+    "booksamillion.com": "Books-A-Million",
+    "powells.com": "Powell's",
+    "thriftbooks.com": "ThriftBooks",
+}
+
+# Search, listing and error pages are not product pages
+_NOT_A_PRODUCT = re.compile(r"(?<!\d)404(?!\d)|not[-_]?found|/error|/search|/s\?|[?&](k|q|keywords)=", re.IGNORECASE)
+_IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".gif")
+_IMAGE_HOSTS = ("media-amazon.com", "images-amazon.com", "covers.openlibrary.org",
+                "images-bn.com", "books.google", "bookshop.org", "gr-assets.com")
+_NOT_A_COVER = re.compile(r"logo|icon|avatar|sprite|banner|placeholder", re.IGNORECASE)
+_TITLE_STOPWORDS = {"the", "a", "an", "of", "and", "to", "in", "on", "for", "with"}
+
+CANDIDATE_PROMPT = """
+You are Luffy Learning's Book Recommendation Agent.
+
+Recommend {n} real, published books for this request:
+"{request}"
+
+Rules:
+- Only age-appropriate books for the request; nothing R-rated
+- Use each book's exact published title and the author's full name
+- Best matches first{exclude}
+
+Return ONLY a JSON array:
+[
+  {{
+    "title": "string",
+    "author": "string",
+    "age_range": "string (e.g. 7-10)",
+    "reason": "string (a short paragraph on why this book fits)",
+    "themes": ["string", "string"]
+  }}
+]
+"""
+
+
+# ============================================================
+# ✅ LOCAL VALIDATION RULES
+# ============================================================
+def _words(text: str) -> str:
+    """Lowercase words only, so URL slugs ("charlottes-web") compare with titles."""
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", str(text).lower().replace("'", "")).split())
+
+
+def title_matches(title: str, text: str) -> bool:
+    """Most of the main title's words (subtitle ignored) appear in `text`."""
+    main = re.split(r"[:(]", title)[0]
+    words = [w for w in _words(main).split() if w not in _TITLE_STOPWORDS] or _words(main).split()
+    if not words:
+        return False
+    haystack = set(_words(text).split())
+    found = sum(w in haystack for w in words)
+    return found == len(words) if len(words) <= 2 else found / len(words) >= 0.75
+
+
+def author_matches(author: str, text: str) -> bool:
+    """The (first) author's last name appears in `text`."""
+    first_author = re.split(r",| and | & ", str(author))[0]
+    names = _words(first_author).split()
+    return bool(names) and names[-1] in set(_words(text).split())
+
+
+def retailer_for(url: str) -> Optional[str]:
+    """Retailer name for a product-page URL, or None."""
+    parsed = urlparse(str(url))
+    if parsed.scheme not in ("http", "https") or _NOT_A_PRODUCT.search(url):
+        return None
+    host = parsed.netloc.lower()
+    return next((name for fragment, name in RETAILERS.items() if fragment in host), None)
+
+
+def is_cover_url(url: str) -> bool:
+    parsed = urlparse(str(url))
+    if parsed.scheme not in ("http", "https") or _NOT_A_COVER.search(parsed.path):
+        return False
+    return parsed.path.lower().endswith(_IMAGE_EXTENSIONS) or any(h in parsed.netloc for h in _IMAGE_HOSTS)
+
+
+def pick_buy_link(book: Dict[str, Any], results: list) -> Optional[Dict[str, str]]:
+    """Best validated product link among search results (preferred retailers first)."""
+    matches = []
+    for result in results:
+        url = result.get("url", "")
+        retailer = retailer_for(url)
+        text = f"{result.get('title', '')} {url} {str(result.get('content', ''))[:600]}"
+        if retailer and title_matches(book["title"], text) and author_matches(book["author"], text):
+            matches.append((list(RETAILERS.values()).index(retailer), url, retailer))
+    if not matches:
+        return None
+    _, url, retailer = min(matches)
+    return {"buy_link": url, "retailer": retailer}
+
+
+def cover_candidates(images: list) -> list:
+    """Image URLs from a search that look like book covers, in result order."""
+    urls = [image.get("url") if isinstance(image, dict) else image for image in images]
+    return [url for url in urls if url and is_cover_url(url)]
+
+
+def _normalize_candidate(item) -> Optional[Dict[str, str]]:
+    if not isinstance(item, dict):
+        return None
+    title, author = str(item.get("title", "")).strip(), str(item.get("author", "")).strip()
+    if not title or not author:
+        return None
+    return {
+        "title": title,
+        "author": author,
+        "age_range": str(item.get("age_range", "")).strip(),
+        "reason": str(item.get("reason", "")).strip(),
+        "themes": [str(t).strip() for t in item.get("themes") or [] if str(t).strip()][:6],
+    }
+
+
+# ============================================================
+# 🚀 PIPELINE
+# ============================================================
+class RecommendationPipeline:
+    """
+    1. One streamed LLM call proposes candidate books as JSON.
+    2. As each candidate arrives, its cover and buy-link searches start in
+       parallel (through the shared search cache).
+    3. Local rules validate links and covers (with `covers`, each cover is
+       downloaded and checked too); books without both are dropped.
+    """
+
+    def __init__(self, client, search_tool=None, search_cache: DiskCache = None,
+                 results_cache: DiskCache = None, covers: CoverCache = None, max_workers: int = 8):
+        self.client = client
+        self.covers = covers
+        self.search_cache = search_cache
+        self.results_cache = results_cache
+        self.max_workers = max_workers
+        self._search_tool = search_tool
+        self._tool_lock = threading.Lock()
+
+    @property
+    def search_tool(self):
+        with self._tool_lock:
+            if self._search_tool is None:
+                self._search_tool = default_search_tool()
+            return self._search_tool
+
+    def _search(self, query: str, include_images: bool = False) -> dict:
+        args = {"query": query, "include_images": True} if include_images else {"query": query}
+        try:
+            result = cached_search(self.search_tool, self.search_cache, args)
+        except Exception as e:
+            print("Book search error:", e)
+            return {}
+        return result if isinstance(result, dict) else {}
+
+    # -------------------------------------------------------
+    def propose(self, user_input: str, n: int, exclude=()):
+        """Candidate books, streamed as the model writes them."""
+        skip = {_words(t) for t in exclude}
+        exclude_rule = f"\n- Do NOT include any of: {'; '.join(exclude)}" if exclude else ""
+        prompt = CANDIDATE_PROMPT.format(n=n, request=user_input, exclude=exclude_rule).strip()
+
+        for candidate in stream_chat_objects(
+            self.client,
+            _normalize_candidate,
+            model="gpt-4o-mini",
+            temperature=0.6,
+            messages=[{"role": "user", "content": prompt}],
+        ):
+            if _words(candidate["title"]) not in skip:
+                yield candidate
+
+    def find_cover(self, book: dict) -> Optional[str]:
+        result = self._search(f"{book['title']} {book['author']} book cover", include_images=True)
+        candidates = cover_candidates(result.get("images") or [])
+        if self.covers is None:
+            return candidates[0] if candidates else None
+        # The first image that downloads and decodes; its thumbnail is cached for display
+        return next((url for url in candidates[:MAX_COVER_TRIES] if self.covers.get(url)), None)
+
+    def find_buy_link(self, book: dict) -> Optional[Dict[str, str]]:
+        main_title = re.split(r"[:(]", book["title"])[0].strip()
+        queries = [f"{book['title']} {book['author']} buy", f"{main_title} {book['author']} book"]
+        # The fallback query only runs for books the first search didn't settle
+        for query in dict.fromkeys(queries):
+            link = pick_buy_link(book, self._search(query).get("results") or [])
+            if link:
+                return link
+        return None
+
+    # -------------------------------------------------------
+    def recommend(self, user_input: str, num_books: int = 5, exclude=()) -> list:
+        """
+        Validated books (title, author, age_range, reason, themes, cover_image,
+        buy_link, retailer), none of them titled as in `exclude`.
+        """
+        key = normalize_request(user_input)
+        # Gap-filling requests (with exclusions) are partial answers, so they bypass the results cache
+        use_cache = self.results_cache is not None and not exclude
+        if use_cache:
+            books = self.results_cache.get(key)
+            if books is not None:
+                return books
+
+        self.search_tool  # fail fast (before the LLM call) if search isn't configured
+        jobs = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for candidate in self.propose(user_input, num_books + EXTRA_CANDIDATES, exclude):
+                jobs.append((
+                    candidate,
+                    pool.submit(self.find_cover, candidate),
+                    pool.submit(self.find_buy_link, candidate),
+                ))
+
+            books = []
+            for candidate, cover, link in jobs:
+                cover, link = cover.result(), link.result()
+                if cover and link:
+                    books.append({**candidate, "cover_image": cover, **link})
+
+        books = books[:num_books]
+        if use_cache and books:
+            self.results_cache.set(key, books)
+        return books
+
+
+def build_pipeline(client, search_tool=None, search_cache: DiskCache = None,
+                   results_cache: DiskCache = None, covers: CoverCache = None) -> RecommendationPipeline:
+    """New pipeline; pass `search_tool` (any LangChain tool) to replace Tavily."""
+    return RecommendationPipeline(client, search_tool=search_tool, search_cache=search_cache,
+                                  results_cache=results_cache, covers=covers)
+
+
+@st.cache_resource(show_spinner=False)
+def get_pipeline(_client) -> RecommendationPipeline:
+    """Process-wide pipeline sharing the recommender's caches."""
+    return build_pipeline(_client, search_cache=get_search_cache(), results_cache=get_results_cache(),
+                          covers=get_cover_cache())
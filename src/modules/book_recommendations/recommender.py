@@ -0,0 +1,271 @@
+"""
+Book recommendation agent - built on first use and shared by every session
+"""
+import os
+import re
+import json
+import streamlit as st
+
+from src.services.disk_cache import DiskCache
+from src.utils.paths import DATA_DIR
+
+# Level 1: search query -> search results; level 2: user request -> final book list
+SEARCH_CACHE_PATH = os.path.join(DATA_DIR, "book_search_cache.db")
+RESULTS_CACHE_PATH = os.path.join(DATA_DIR, "book_results_cache.db")
+SEARCH_TTL = 7 * 86400
+RESULTS_TTL = 3 * 86400
+
+# System prompt for the tool-calling agent (braces doubled for ChatPromptTemplate)
+RECOMMENDER_PROMPT = """
+You are Luffy Learning's Book Recommendation Agent.
+
+Your task:
+1. Recommend 3–5 books based on the user's request
+2. Give a paragraph for each book you recommend and why you recommend it.
+3. For EACH book:
+   - CRITICAL: Use the Tavily search tool to find a book cover image for the exact book you recommend.
+   - If you cannot find a cover image for a book, DO NOT include that book in your recommendations.
+   - Only recommend books where you successfully found a cover image URL.
+   - Use the Tavily search tool MULTIPLE TIMES to find a valid buy link:
+     * First search: "[book title] [author] buy Amazon"
+     * If that doesn't return a valid Amazon link, search: "[book title] [author] buy"
+     * If still no results, try variations: "[main title without subtitle] [author] buy" or just "[author] [main title]"
+     * Review the search results carefully and select a link that:
+       - Is from a reputable retailer (Amazon, Barnes & Noble, Bookshop.org, IndieBound, Target, Walmart, etc.)
+       - Contains the book title (partial matches are acceptable - e.g., "The Hating Game" matches "The Hating Game: A Novel")
+       - Contains the author name (or at least the last name)
+       - Is NOT a 404 error page, "page not found", or broken link
+       - Is a direct product page where the book can be purchased
+       - ACCEPT partial title matches - if the main title matches, it's fine even if subtitles differ
+4. Return your FINAL answer as valid JSON ONLY with this format:
+IMPORTANT: Do not recommend books that are not age-appropriate for the user's request.
+IMPORTANT: Do not recommend anything R-rated
+
+[
+  {{
+    "title": "...",
+    "author": "...",
+    "age_range": "...",
+    "reason": "...",
+    "cover_image": "...",
+    "buy_link": "...",
+    "retailer": "..."
+  }}
+]
+
+Rules:
+- Always use Tavily for images and links
+- CRITICAL: DO NOT recommend any book without a cover image - if you cannot find an image URL, exclude that book from recommendations
+- CRITICAL: The cover_image field must contain a valid image URL (starting with http:// or https://) - never leave it empty or use placeholder text
+- CRITICAL: Only use buy links that are VALID and WORKING - verify the link points to an actual product page
+- When searching for buy links:
+  * Use flexible search queries - try full title first, then main title without subtitle if needed
+  * ACCEPT PARTIAL MATCHES: If a link shows "The Hating Game" and you're looking for "The Hating Game: A Novel", that's acceptable
+  * The main title words should match, even if subtitles or additional text differ
+  * Author name should match (at least last name)
+- Prefer Amazon if you find a valid Amazon product page link
+- If Amazon doesn't have a valid link, use ANY other reputable retailer (Barnes & Noble, Bookshop.org, IndieBound, Target, etc.) with a valid product page
+- NEVER use links that lead to error pages, "page not found", or broken URLs
+- The buy_link must be a complete, working URL (starting with http:// or https://)
+- Include the retailer name (e.g., "Amazon", "Barnes & Noble", "Bookshop.org") in the "retailer" field
+- Do NOT include any text outside JSON
+"""
+
+
+class RecommenderUnavailable(RuntimeError):
+    """The search service the agent needs is not configured."""
+
+
+class RecommendationParseError(ValueError):
+    """The agent answered, but not with a JSON list of books."""
+
+    def __init__(self, output: str):
+        super().__init__("Could not parse JSON from agent response.")
+        self.output = output
+
+
+def parse_books(output_text: str) -> list:
+    """Book list from the agent's final answer (bare JSON, extra text or a code block)."""
+    # Try to extract JSON from the output (might be in markdown code blocks or have extra text)
+    json_match = re.search(r'\[[\s\S]*\]', output_text)
+    json_str = json_match.group(0) if json_match else output_text
+
+    try:
+        return json.loads(json_str)
+    except json.JSONDecodeError:
+        code_block_match = re.search(r'```(?:json)?\s*(\[[\s\S]*?\])\s*```', output_text)
+        if code_block_match:
+            return json.loads(code_block_match.group(1))
+        raise RecommendationParseError(output_text)
+
+
+# ============================================================
+# 🗄️ CACHES
+# ============================================================
+def normalize_query(query: str) -> str:
+    """Search cache key: lowercase, punctuation and extra spaces dropped."""
+    return " ".join(re.sub(r"[^\w'&-]+", " ", str(query).lower()).split())
+
+
+def normalize_request(text: str) -> str:
+    """
+    Result cache key: the request's words in order, lowercase, punctuation
+    and extra spaces dropped ("Dogs, not cats!" == "dogs not cats", but
+    never "cats, not dogs").
+    """
+    return " ".join(re.findall(r"[a-z0-9']+", str(text).lower()))
+
+
+def _search_key(args: dict) -> str:
+    options = {k: v for k, v in args.items() if k != "query" and v is not None}
+    key = normalize_query(args.get("query", ""))
+    return f"{key} {json.dumps(options, sort_keys=True)}" if options else key
+
+
+def cached_search(search_tool, cache: DiskCache, args: dict):
+    """Run the search tool with `args`, answering repeated queries from `cache` (errors aren't stored)."""
+    if cache is None:
+        return search_tool.invoke(args)
+
+    key = _search_key(args)
+    result = cache.get(key)
+    if result is None:
+        result = search_tool.invoke(args)
+        if not (isinstance(result, dict) and result.get("error")):
+            cache.set(key, result)
+    return result
+
+
+def cached_search_tool(search_tool, cache: DiskCache):
+    """Same tool (name, description, arguments) answering repeated queries from `cache`."""
+    from langchain_core.tools import StructuredTool
+
+    def search(**kwargs):
+        return cached_search(search_tool, cache, kwargs)
+
+    return StructuredTool.from_function(
+        func=search,
+        name=search_tool.name,
+        description=search_tool.description,
+        args_schema=search_tool.args_schema,
+    )
+
+
+@st.cache_resource
+def get_search_cache() -> DiskCache:
+    return DiskCache(SEARCH_CACHE_PATH, ttl=SEARCH_TTL, max_entries=5000)
+
+
+@st.cache_resource
+def get_results_cache() -> DiskCache:
+    return DiskCache(RESULTS_CACHE_PATH, ttl=RESULTS_TTL, max_entries=1000)
+
+
+def cached_recommendations(user_input: str):
+    """Book list for an equivalent earlier request, or None (no agent is built)."""
+    return get_results_cache().get(normalize_request(user_input))
+
+
+# ============================================================
+# 🤖 AGENT
+# ============================================================
+def default_search_tool():
+    """Tavily web search; raises RecommenderUnavailable when no API key is set."""
+    if not os.getenv("TAVILY_API_KEY"):
+        raise RecommenderUnavailable(
+            "Book search is not configured - set TAVILY_API_KEY to enable recommendations."
+        )
+    from langchain_tavily import TavilySearch
+    return TavilySearch(max_results=5, search_depth="basic")
+
+
+class BookRecommender:
+    """
+    LLM + web-search agent that returns validated book recommendations.
+
+    LangChain and the search client are imported here rather than at module
+    import, so the app starts (and other tabs work) without them configured.
+    """
+
+    def __init__(self, llm=None, search_tool=None, search_cache: DiskCache = None,
+                 results_cache: DiskCache = None):
+        from langchain_core.prompts import ChatPromptTemplate
+        from langchain_classic.agents import create_openai_tools_agent, AgentExecutor
+
+        if llm is None:
+            from src.services.openai_client import chat_model
+            llm = chat_model(temperature=0.6)
+
+        if search_tool is None:
+            search_tool = default_search_tool()
+
+        if search_cache is not None:
+            search_tool = cached_search_tool(search_tool, search_cache)
+
+        self.llm = llm
+        self.tools = [search_tool]
+        self.search_cache = search_cache
+        self.results_cache = results_cache
+
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", RECOMMENDER_PROMPT),
+            ("human", "{input}"),
+            ("placeholder", "{agent_scratchpad}"),
+        ])
+        agent = create_openai_tools_agent(llm=llm, tools=self.tools, prompt=prompt)
+        self.executor = AgentExecutor(agent=agent, tools=self.tools, verbose=False)
+
+    def recommend(self, user_input: str, num_books: int = None, exclude=()) -> list:
+        """
+        Book list for the request (at most `num_books`, none titled as in
+        `exclude`): from the results cache when an equivalent request was
+        answered recently, otherwise from the agent. Raises
+        RecommendationParseError if the agent's answer isn't a book list.
+        """
+        key = normalize_request(user_input)
+        # Gap-filling requests (with exclusions) are partial answers, so they bypass the results cache
+        use_cache = self.results_cache is not None and not exclude
+        if use_cache:
+            books = self.results_cache.get(key)
+            if books is not None:
+                return books[:num_books] if num_books else books
+
+        notes = []
+        if num_books:
+            notes.append(f"Recommend at most {num_books} books.")
+        if exclude:
+            notes.append(f"Do NOT include any of: {'; '.join(exclude)}")
+        result = self.executor.invoke({"input": "\n\n".join([user_input, *notes])})
+        books = parse_books(result.get("output", "").strip())
+
+        # The agent may still repeat an excluded title
+        skip = {normalize_request(t) for t in exclude}
+        books = [b for b in books if not (isinstance(b, dict) and normalize_request(b.get("title", "")) in skip)]
+
+        if use_cache and books and all(isinstance(b, dict) and b.get("title") for b in books):
+            self.results_cache.set(key, books)
+        return books[:num_books] if num_books else books
+
+    def cache_stats(self) -> dict:
+        """Hit counters per cache level (None when that level is off)."""
+        return {
+            "search": self.search_cache.stats() if self.search_cache is not None else None,
+            "results": self.results_cache.stats() if self.results_cache is not None else None,
+        }
+
+
+def build_recommender(llm=None, search_tool=None, search_cache: DiskCache = None,
+                      results_cache: DiskCache = None) -> BookRecommender:
+    """
+    New recommender. Pass `search_tool` (any LangChain tool, e.g. a canned
+    offline stand-in) and/or `llm` to replace Tavily and the default model;
+    caches are optional.
+    """
+    return BookRecommender(llm=llm, search_tool=search_tool,
+                           search_cache=search_cache, results_cache=results_cache)
+
+
+@st.cache_resource(show_spinner=False)
+def get_recommender() -> BookRecommender:
+    """Process-wide recommender, built the first time the tab is used."""
+    return build_recommender(search_cache=get_search_cache(), results_cache=get_results_cache())
@@ -1,4 +1,5 @@
 import os
+import re
 import time
 import json
 import sqlite3
@@ -6,6 +7,7 @@ import streamlit as st
 
 from src.services.openai_client import get_openai_client, get_llm, get_embeddings
 from src.services.vector_store import VectorStore
+from src.services.dictionary import get_dictionary
 from src.utils.response_check import ResponseCheck
 from src.utils.text_to_speech import TextToSpeech
 
@@ -37,6 +39,17 @@ class ReadingTutor:
         "explain the book", "what is the book about"
     ]
 
+    # Only questions that are nothing but a definition request; anything
+    # longer ("what does Atticus mean when…") is a question about the story
+    DEFINITION_PATTERN = re.compile(
+        r"^\s*(?:what\s+does|what's|whats)\s+(?:the\s+word\s+)?([\"']?)([a-z][a-z'-]*)\1\s+mean\s*[?.!]*\s*$"
+        r"|^\s*(?:define|(?:what\s+is\s+)?(?:the\s+)?meaning\s+of)\s+(?:the\s+word\s+)?([\"']?)([a-z][a-z'-]*)\3\s*[?.!]*\s*$",
+        re.IGNORECASE,
+    )
+
+    # "What does he mean?" asks about a character, not a word
+    NOT_DEFINABLE = {"he", "she", "it", "they", "this", "that", "him", "her", "them", "you", "i", "we"}
+
     PROMPT = """
 You are a safe, friendly, knowledgeable reading tutor.
 
@@ -132,6 +145,48 @@ Now answer following ALL rules.
         q = question.lower()
         return any(k in q for k in self.SUMMARY_KEYWORDS)
 
+    # ---------------------------------------------------------------
+    def _definition_word(self, question: str):
+        match = self.DEFINITION_PATTERN.search(question)
+        if not match:
+            return None
+
+        quoted = match.group(1) or match.group(3) or re.search(r"\bthe\s+word\b", question, re.IGNORECASE)
+        word = (match.group(2) or match.group(4)).strip("'")
+        # An unquoted capitalized word is most likely a character's name
+        if word.lower() in self.NOT_DEFINABLE or (word[0].isupper() and not quoted):
+            return None
+        return word.lower()
+
+    # ---------------------------------------------------------------
+    def define_word(self, word: str, question: str, grade: str):
+        """Answer "what does X mean?" from the shared dictionary (one LLM call on a miss)."""
+        start = time.time()
+        try:
+            entries = get_dictionary().define(self.client, [word], grade)
+            entry = entries.get(word) or next(iter(entries.values()), None)
+        except Exception as e:
+            print("Dictionary error:", e)
+            entry = None
+
+        if not entry:
+            self._log("definition_miss", "", question, 0.0, start)
+            return f"I'm not sure what **{word}** means — try asking about the story! 😊"
+
+        ipa = f" /{entry['ipa']}/" if entry.get("ipa") else ""
+        reply = (
+            f"**{word}**{ipa} ({entry['part_of_speech']}): {entry['definition']}\n\n"
+            f"*Example:* {entry['example_sentence']}"
+        )
+        if entry.get("synonyms"):
+            reply += f"\n\n*Similar words:* {', '.join(entry['synonyms'])}"
+
+        if not ResponseCheck.is_output_safe(reply):
+            reply = "Let's switch to something better for our age group 📚✨"
+
+        self._log("definition", "", question, 1.0, start)
+        return reply
+
     # ---------------------------------------------------------------
     def summarize_whole_book(self):
         """
@@ -185,7 +240,7 @@ Now answer following ALL rules.
         return final_summary
 
     # ---------------------------------------------------------------
-    def tutor_turn(self, student_question: str):
+    def tutor_turn(self, student_question: str, grade: str):
         if not self.pdf_loaded:
             return "The book file is missing. Please upload it first.", 0.0
 
@@ -197,6 +252,13 @@ Now answer following ALL rules.
         if self._is_summary_request(student_question):
             return self.summarize_whole_book(), 1.0
 
+        # ============================================================
+        # SPECIAL MODE — WORD DEFINITION (shared dictionary)
+        # ============================================================
+        word = self._definition_word(student_question)
+        if word:
+            return self.define_word(word, student_question, grade), 1.0
+
         # ============================================================
         # NORMAL Q&A MODE
         # ============================================================
@@ -40,11 +40,14 @@ def ask_the_book_tab(client):
         st.error(f"PDF not found: {tutor.pdf_path}")
         return
 
+    # Word definitions are pitched at this level
+    grade = st.selectbox("Reading level (grades):", ["1-3", "4-6", "7-9", "10-12"], index=1)
+
     question = st.text_input("Ask a question about the story:")
 
     if st.button("Ask"):
         with st.spinner("Thinking…"):
-            reply, score = tutor.tutor_turn(question)
+            reply, score = tutor.tutor_turn(question, grade)
 
         st.markdown(f"**Tutor:** {reply}")
 
@@ -1,21 +1,18 @@
+import re
 import json
-from openai import OpenAI
+import threading
 import streamlit as st
 from dotenv import load_dotenv
 
+from src.utils.concurrency import map_bounded
+from src.services.llm_gateway import get_gateway
+from src.modules.curriculum.section_store import content_hash, get_section_store
+
 load_dotenv()
 
-client = OpenAI()  
+client = get_gateway()
 
-def call_curriculum_agent(raw_text: str) -> dict:
-    """
-    Uses an LLM to convert a text curriculum into structured JSON format.
-    """
-    if not raw_text.strip():
-        st.warning("No text to process.")
-        return {}
-
-    system_prompt = """
+SYSTEM_PROMPT = """
 You are CurricAI, an expert curriculum architect.
 
 Extract a JSON structure from the provided syllabus or curriculum:
@@ -40,26 +37,248 @@ Rules:
 - No commentary or markdown outside JSON.
 """
 
-    # Avoid too-long tokens for now
-    trimmed_text = raw_text[:15000]
-
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        response_format={"type": "json_object"},
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": trimmed_text},
-        ],
-        temperature=0.3
-    )
-
-    result = response.choices[0].message.content
-
-    try:
-        return json.loads(result)
-    except json.JSONDecodeError:
-        st.error("Failed to parse JSON. Displaying raw output.")
-        return {"raw_output": result}
+# Token budget per window; longer sections are split by line
+WINDOW_MAX_TOKENS = 3000
+
+# Content-defined window cuts: on average one every N sections, so an edit
+# only changes the window around it instead of shifting every later one
+WINDOW_BOUNDARY_MODULUS = 4
+
+# The prompt's module limit, enforced again after windows are merged
+MAX_MODULES = 12
+
+# Bump when SYSTEM_PROMPT or the model changes so stored results are not reused
+STRUCTURE_STORE_VERSION = "structure:v1"
+
+# Every structuring request in the process shares these slots (windows of
+# one document and documents of a batch alike)
+_llm_slots = threading.BoundedSemaphore(16)
+
+
+def set_llm_concurrency(limit: int):
+    """Cap concurrent structuring requests across the whole process."""
+    global _llm_slots
+    _llm_slots = threading.BoundedSemaphore(max(1, limit))
+
+
+def _request_structure(text: str, part_note: str = "") -> str:
+    """One LLM call: curriculum text → raw JSON string."""
+    with _llm_slots:
+        response = client.chat.completions.create(
+            model="gpt-4o-mini",
+            response_format={"type": "json_object"},
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT + part_note},
+                {"role": "user", "content": text},
+            ],
+            temperature=0.3
+        )
+
+    return response.choices[0].message.content
+
+
+def call_curriculum_agent(raw_text: str, info=st.caption, warn=st.warning, strict: bool = False) -> dict:
+    """
+    Uses an LLM to convert a text curriculum into structured JSON format.
+    The document is structured window-by-window in parallel and merged;
+    windows seen before (by content hash) are not sent again, whatever the
+    document's length.
+    Progress notes go to `info` and problems to `warn` (Streamlit by
+    default; headless callers pass their own logger). With `strict`, a
+    section that can't be processed raises instead of being left out.
+    """
+    if not raw_text.strip():
+        warn("No text to process.")
+        return {}
+
+    return structure_in_windows(raw_text, info=info, warn=warn, strict=strict)
+
+
+# ============================================================
+# 🧩 MAP-REDUCE STRUCTURING (long curricula)
+# ============================================================
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def split_sections(text: str) -> list:
+    """Section boundaries: `### ` headers when present, otherwise blank lines."""
+    if re.search(r"^### ", text, flags=re.MULTILINE):
+        parts = re.split(r"(?m)^(?=### )", text)
+    else:
+        parts = re.split(r"\n\s*\n", text)
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _is_boundary(section: str) -> bool:
+    return int(content_hash(section)[:8], 16) % WINDOW_BOUNDARY_MODULUS == 0
+
+
+def split_into_windows(text: str, max_tokens: int = WINDOW_MAX_TOKENS) -> list:
+    """
+    Pack whole sections into windows of at most `max_tokens`; split oversized sections by line.
+
+    Windows also close after any section whose hash marks a boundary, so cuts
+    depend on content rather than position: revising one section leaves the
+    other windows (and their stored results) unchanged.
+    """
+    windows = []
+    current = []
+    current_tokens = 0
+
+    def flush():
+        nonlocal current, current_tokens
+        if current:
+            windows.append("\n\n".join(current))
+        current, current_tokens = [], 0
+
+    for section in split_sections(text):
+        pieces = [section]
+        if _estimate_tokens(section) > max_tokens:
+            pieces, buf = [], ""
+            for line in section.split("\n"):
+                if buf and _estimate_tokens(buf + line) > max_tokens:
+                    pieces.append(buf)
+                    buf = ""
+                buf += line + "\n"
+            if buf:
+                pieces.append(buf)
+
+        for piece in pieces:
+            tokens = _estimate_tokens(piece)
+            if current and current_tokens + tokens > max_tokens:
+                flush()
+            current.append(piece)
+            current_tokens += tokens
+
+        # Small windows keep filling, so short syllabi stay one call
+        if current_tokens >= max_tokens // 4 and _is_boundary(section):
+            flush()
+
+    flush()
+    return windows
+
+
+def _module_key(name: str) -> str:
+    """
+    Normalize module names so "Week 3: Loops" and "Unit 3 - loops" merge.
+    The ordinal stays in the key ("Week 7: Loops" is a different module),
+    and a bare "Week 3" keeps its full name.
+    """
+    full = re.sub(r"[^a-z0-9]+", " ", name.lower()).strip()
+    match = re.match(r"(?:module|unit|week|chapter|part|lesson)\s*(\d+)\s+(.+)", full)
+    return f"{match.group(1)} {match.group(2)}" if match else full
+
+
+def merge_structures(parts: list) -> dict:
+    """
+    Deterministic reduce: modules keep first-appearance order, duplicates
+    (by normalized name) merge their skills, title comes from the first window.
+    """
+    title = next((p.get("title") for p in parts if p.get("title")), "Untitled Curriculum")
+    merged = {}
+
+    for part in parts:
+        for module in part.get("modules", []):
+            if not isinstance(module, dict):
+                continue
+            name = str(module.get("name", "")).strip()
+            key = _module_key(name)
+            if not key:
+                continue
+
+            if key not in merged:
+                merged[key] = {
+                    "name": name,
+                    "description": str(module.get("description", "")).strip(),
+                    "skills": [],
+                    "_seen_skills": set(),
+                }
+            entry = merged[key]
+
+            if not entry["description"]:
+                entry["description"] = str(module.get("description", "")).strip()
+
+            for skill in module.get("skills", []):
+                skill = str(skill).strip()
+                skill_key = skill.lower().rstrip(".")
+                if skill and skill_key not in entry["_seen_skills"]:
+                    entry["_seen_skills"].add(skill_key)
+                    entry["skills"].append(skill)
+
+    modules = []
+    for entry in merged.values():
+        entry.pop("_seen_skills")
+        modules.append(entry)
+
+    return {"title": title, "modules": _cap_modules(modules)}
+
+
+def _cap_modules(modules: list, limit: int = MAX_MODULES) -> list:
+    """
+    At most `limit` modules: past it, neighbouring modules are combined
+    (names joined, skills kept), so nothing from any window is dropped.
+    """
+    if len(modules) <= limit:
+        return modules
+
+    size = -(-len(modules) // limit)
+    capped = []
+    for start in range(0, len(modules), size):
+        group = modules[start:start + size]
+        capped.append({
+            "name": " / ".join(m["name"] for m in group),
+            "description": " ".join(m["description"] for m in group if m["description"]),
+            "skills": list(dict.fromkeys(skill for m in group for skill in m["skills"])),
+        })
+    return capped
+
+
+def structure_in_windows(raw_text: str, max_tokens: int = WINDOW_MAX_TOKENS, max_in_flight: int = 6,
+                         info=st.caption, warn=st.warning, strict: bool = False) -> dict:
+    """
+    Map: extract modules per window in parallel. Reduce: merge_structures.
+
+    Failed windows are left out with a warning (raised with `strict`).
+    Window results are stored by content hash, so re-analyzing a revised
+    upload only sends new or changed windows to the LLM; the rest are
+    spliced back in from the store in document order.
+    """
+    windows = split_into_windows(raw_text, max_tokens=max_tokens)
+    total = len(windows)
+
+    store = get_section_store()
+    kind = f"{STRUCTURE_STORE_VERSION}:window"
+    hashes = [content_hash(w) for w in windows]
+    cached = store.get_many(kind, hashes)
+
+    def extract(indexed_window):
+        i, window = indexed_window
+        note = (
+            f"\nThis is part {i + 1} of {total} of a longer curriculum. "
+            "Extract only the modules that appear in this part."
+        ) if total > 1 else ""
+        part = json.loads(_request_structure(window, part_note=note))
+        store.put(kind, hashes[i], part)
+        return part
+
+    todo = [(i, w) for i, w in enumerate(windows) if hashes[i] not in cached]
+    fresh = dict(zip((i for i, _ in todo), map_bounded(extract, todo, max_in_flight=max_in_flight)))
+    parts = [cached.get(h, fresh.get(i)) for i, h in enumerate(hashes)]
+
+    reused = total - len(todo)
+    if reused:
+        info(f"♻️ Reused {reused} of {total} unchanged curriculum sections from a previous analysis.")
+
+    failed = sum(1 for p in parts if not isinstance(p, dict))
+    if failed and strict:
+        # Windows that did succeed are stored, so a retry only re-sends these
+        raise ValueError(f"{failed} of {total} curriculum sections could not be processed")
+    if failed:
+        warn(f"{failed} of {total} curriculum sections could not be processed.")
+
+    return merge_structures([p for p in parts if isinstance(p, dict)])
 
 
 def generate_tasks_from_structure(structure: dict) -> list:
@@ -0,0 +1,219 @@
+"""
+Headless bulk processing for a directory of syllabi
+
+Run with: python -m src.modules.curriculum.batch SYLLABI_DIR [--out OUT_DIR] [--workers 4] [--llm-concurrency 8]
+
+Each input gets OUT_DIR/<relative path>.json (structure + tasks). Outputs are
+the checkpoint: a rerun skips inputs whose output matches the file's hash and
+retries everything that failed. A throughput/failure summary is written to
+OUT_DIR/_summary.json.
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from src.modules.curriculum.helpers import extract_text_from_path
+from src.modules.curriculum.agent import call_curriculum_agent, generate_tasks_from_structure, set_llm_concurrency
+
+SYLLABUS_EXTENSIONS = {".pdf", ".txt"}
+SUMMARY_NAME = "_summary.json"
+
+
+# ============================================================
+# 📂 INPUTS + CHECKPOINTS
+# ============================================================
+def find_syllabi(root: str) -> list:
+    """Every PDF/TXT under `root`, as sorted relative paths."""
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+        for name in filenames:
+            if not name.startswith(".") and os.path.splitext(name)[1].lower() in SYLLABUS_EXTENSIONS:
+                found.append(os.path.relpath(os.path.join(dirpath, name), root))
+    return sorted(found)
+
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _output_path(out_dir: str, rel_path: str) -> str:
+    return os.path.join(out_dir, rel_path + ".json")
+
+
+def _is_done(out_path: str, source_hash: str) -> bool:
+    try:
+        with open(out_path, "r", encoding="utf-8") as f:
+            return json.load(f).get("source_sha256") == source_hash
+    except (OSError, ValueError):
+        return False
+
+
+def _write_json(path: str, payload: dict):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+# ============================================================
+# 🏭 PIPELINE
+# ============================================================
+def _quiet_worker():
+    """Extraction workers: keep pypdf's per-object warnings out of the run log."""
+    logging.getLogger("pypdf").setLevel(logging.ERROR)
+
+
+def _structure_one(rel_path: str, text: str, log=print) -> dict:
+    if not text.strip():
+        raise ValueError("no text could be extracted")
+
+    note = lambda message: log(f"  {rel_path}: {message}")
+    # Strict: a partial structure must not be checkpointed as done
+    structure = call_curriculum_agent(text, info=note, warn=note, strict=True)
+    if not structure.get("modules"):
+        raise ValueError("the model returned no modules")
+
+    return {"structure": structure, "tasks": generate_tasks_from_structure(structure)}
+
+
+def process_directory(source_dir: str, out_dir: str, workers: int = None,
+                      llm_concurrency: int = 8, log=print) -> dict:
+    """
+    Extract every syllabus on a process pool and structure them on threads
+    that share `llm_concurrency` LLM slots. Returns the run summary.
+    """
+    start = time.time()
+    set_llm_concurrency(llm_concurrency)
+
+    inputs = find_syllabi(source_dir)
+    todo = []
+    skipped = 0
+    for rel_path in inputs:
+        source_hash = _file_hash(os.path.join(source_dir, rel_path))
+        if _is_done(_output_path(out_dir, rel_path), source_hash):
+            skipped += 1
+        else:
+            todo.append((rel_path, source_hash))
+
+    log(f"{len(inputs)} syllabi found, {skipped} already done, {len(todo)} to process")
+
+    processed = 0
+    failures = {}
+    extracted_bytes = 0
+    extraction_finished = start
+    structure_seconds = 0.0
+
+    workers = workers or max(1, (os.cpu_count() or 2) - 1)
+    extract_pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_quiet_worker,
+    )
+    # Structuring threads mostly wait on the network; the agent's LLM slots do the limiting
+    llm_pool = ThreadPoolExecutor(max_workers=max(1, llm_concurrency), thread_name_prefix="syllabus")
+
+    try:
+        # One loop over both stages, so each output is written (checkpointed)
+        # as soon as its structuring finishes
+        pending = {
+            extract_pool.submit(extract_text_from_path, os.path.join(source_dir, rel_path)): ("extract", rel_path, source_hash)
+            for rel_path, source_hash in todo
+        }
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, rel_path, source_hash, *timing = pending.pop(future)
+
+                if stage == "extract":
+                    try:
+                        text = future.result()
+                    except Exception as e:
+                        failures[rel_path] = f"extraction: {e}"
+                        log(f"  ❌ {rel_path}: extraction failed ({e})")
+                        continue
+
+                    extracted_bytes += len(text.encode("utf-8"))
+                    extraction_finished = time.time()
+                    pending[llm_pool.submit(_structure_one, rel_path, text, log)] = (
+                        "structure", rel_path, source_hash, len(text), time.time()
+                    )
+                    continue
+
+                chars, submitted = timing
+                seconds = time.time() - submitted
+                try:
+                    result = future.result()
+                except Exception as e:
+                    failures[rel_path] = f"structuring: {e}"
+                    log(f"  ❌ {rel_path}: structuring failed ({e})")
+                    continue
+
+                structure_seconds += seconds
+                _write_json(_output_path(out_dir, rel_path), {
+                    "source": rel_path,
+                    "source_sha256": source_hash,
+                    "characters": chars,
+                    **result,
+                })
+                processed += 1
+                log(f"  ✅ {rel_path} ({len(result['structure']['modules'])} modules, {seconds:.1f}s)")
+    finally:
+        extract_pool.shutdown(cancel_futures=True)
+        llm_pool.shutdown(cancel_futures=True)
+
+    elapsed = time.time() - start
+    summary = {
+        "source_dir": os.path.abspath(source_dir),
+        "found": len(inputs),
+        "skipped": skipped,
+        "processed": processed,
+        "failed": len(failures),
+        "failures": failures,
+        "elapsed_seconds": round(elapsed, 2),
+        "documents_per_minute": round(processed / elapsed * 60, 2) if elapsed else 0.0,
+        "extracted_mb": round(extracted_bytes / 1e6, 3),
+        "extraction_seconds": round(extraction_finished - start, 2),
+        "avg_structure_seconds": round(structure_seconds / processed, 2) if processed else 0.0,
+    }
+    _write_json(os.path.join(out_dir, SUMMARY_NAME), summary)
+    return summary
+
+
+# ============================================================
+# 🏁 MAIN
+# ============================================================
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("source_dir", help="directory of PDF/TXT syllabi (searched recursively)")
+    parser.add_argument("--out", default=None, help="output directory (default: SOURCE_DIR/_structured)")
+    parser.add_argument("--workers", type=int, default=None, help="extraction processes")
+    parser.add_argument("--llm-concurrency", type=int, default=8, help="concurrent LLM requests")
+    args = parser.parse_args(argv)
+
+    out_dir = args.out or os.path.join(args.source_dir, "_structured")
+    summary = process_directory(args.source_dir, out_dir, workers=args.workers,
+                                llm_concurrency=args.llm_concurrency)
+
+    print(
+        f"\nDone in {summary['elapsed_seconds']}s: {summary['processed']} processed, "
+        f"{summary['skipped']} skipped, {summary['failed']} failed "
+        f"({summary['documents_per_minute']} docs/min). Summary: {os.path.join(out_dir, SUMMARY_NAME)}"
+    )
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
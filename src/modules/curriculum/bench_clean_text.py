@@ -0,0 +1,109 @@
+"""
+Golden check + throughput benchmark for clean_pdf_text
+
+Run with: python -m src.modules.curriculum.bench_clean_text [--sizes 1 10 100]
+"""
+import os
+import re
+import sys
+import time
+import argparse
+import logging
+
+from pypdf import PdfReader
+
+from src.modules.curriculum.helpers import clean_pdf_text
+from src.utils.paths import PROJECT_ROOT
+
+
+# ============================================================
+# 📜 REFERENCE: the original six-pass regex cleaner
+# ============================================================
+def legacy_clean_pdf_text(text: str) -> str:
+    text = re.sub(r"-\s*\n", "", text)
+    text = re.sub(r"(?<![.!?])\n(?!\n)", " ", text)
+    text = re.sub(r" {2,}", " ", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    text = re.sub(
+        r"\n([A-Z][A-Za-z ]{1,40})\n",
+        lambda m: f"\n\n### {m.group(1).strip()}\n\n",
+        text
+    )
+    text = re.sub(r"(?<=[.!?])\s+(?=[A-Z])", "\n\n", text)
+
+    output = []
+    for line in text.split("\n"):
+        stripped = line.strip()
+        if re.match(r"^(\d+\.\s+|[-•–*]\s+)", stripped):
+            cleaned_item = re.sub(r"^(\d+\.\s+|[-•–*]\s+)", "", stripped)
+            output.append(f"• {cleaned_item}")
+        else:
+            output.append(stripped)
+
+    return "\n".join(output).strip()
+
+
+# ============================================================
+# 📚 GOLDEN CORPUS
+# ============================================================
+def load_golden_corpus() -> dict:
+    """Sample curriculum + raw text of every bundled novel (as extract_text_from_file builds it)."""
+    corpus = {}
+
+    sample = os.path.join(PROJECT_ROOT, "python_curriculum_detailed.txt")
+    with open(sample, "r", encoding="utf-8") as f:
+        corpus["python_curriculum_detailed.txt"] = f.read()
+
+    for novels_dir in (os.path.join(PROJECT_ROOT, "data", "novels"), os.path.join(PROJECT_ROOT, "novels")):
+        if not os.path.isdir(novels_dir):
+            continue
+        for name in sorted(os.listdir(novels_dir)):
+            if name.lower().endswith(".pdf") and name not in corpus:
+                reader = PdfReader(os.path.join(novels_dir, name))
+                corpus[name] = "".join((page.extract_text() or "") + "\n\n" for page in reader.pages)
+
+    return corpus
+
+
+def _throughput(fn, text: str) -> float:
+    start = time.perf_counter()
+    fn(text)
+    return len(text.encode("utf-8")) / 1e6 / (time.perf_counter() - start)
+
+
+# ============================================================
+# 🏁 MAIN
+# ============================================================
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 10, 100], help="document sizes in MB")
+    parser.add_argument("--skip-legacy", action="store_true", help="only time the new cleaner")
+    args = parser.parse_args(argv)
+
+    logging.getLogger("pypdf").setLevel(logging.ERROR)
+    corpus = load_golden_corpus()
+
+    print("Golden corpus:")
+    mismatches = 0
+    for name, text in corpus.items():
+        same = clean_pdf_text(text) == legacy_clean_pdf_text(text)
+        mismatches += not same
+        print(f"  {'✅' if same else '❌'} {name} ({len(text) / 1e6:.2f} MB)")
+
+    seed = "\n\n".join(corpus.values())
+    print("\nThroughput (MB/s):")
+    print(f"  {'size':>8}  {'new':>8}  {'legacy':>8}")
+
+    for size_mb in args.sizes:
+        target = int(size_mb * 1e6)
+        doc = (seed * (target // len(seed) + 1))[:target]
+
+        new = _throughput(clean_pdf_text, doc)
+        legacy = "" if args.skip_legacy else f"{_throughput(legacy_clean_pdf_text, doc):8.1f}"
+        print(f"  {size_mb:>6g}MB  {new:8.1f}  {legacy:>8}")
+
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
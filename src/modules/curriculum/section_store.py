@@ -0,0 +1,78 @@
+"""
+Persistent per-section results (structure extraction, summaries) keyed by content hash
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+from src.utils.paths import DATA_DIR
+
+SECTION_STORE_PATH = os.path.join(DATA_DIR, "curriculum_sections.db")
+
+
+def content_hash(text: str) -> str:
+    """Whitespace-insensitive hash, so re-extraction noise doesn't count as a change."""
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+class SectionStore:
+
+    def __init__(self, path: str = SECTION_STORE_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+
+        with self._lock:
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS section_results (
+                    kind TEXT,
+                    content_hash TEXT,
+                    result TEXT,
+                    created REAL,
+                    PRIMARY KEY (kind, content_hash)
+                )
+                """
+            )
+            self.conn.commit()
+
+    def get_many(self, kind: str, hashes) -> dict:
+        hashes = list(set(hashes))
+        found = {}
+
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit
+            for i in range(0, len(hashes), 500):
+                chunk = hashes[i:i + 500]
+                rows = self.conn.execute(
+                    f"SELECT content_hash, result FROM section_results "
+                    f"WHERE kind = ? AND content_hash IN ({','.join('?' * len(chunk))})",
+                    [kind, *chunk],
+                ).fetchall()
+                found.update((h, json.loads(r)) for h, r in rows)
+
+        return found
+
+    def put(self, kind: str, hash_: str, result):
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO section_results VALUES (?,?,?,?)",
+                (kind, hash_, json.dumps(result), time.time()),
+            )
+            self.conn.commit()
+
+
+_STORE = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_section_store() -> SectionStore:
+    """Process-wide store (works outside Streamlit too, e.g. batch jobs)."""
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = SectionStore()
+        return _STORE
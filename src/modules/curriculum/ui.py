@@ -1,19 +1,17 @@
 import streamlit as st
-from src.modules.curriculum.helpers import extract_text_from_file
+from src.modules.curriculum.helpers import open_document
 from src.modules.curriculum.agent import call_curriculum_agent
 import time
 import os
 
 
-# ----------------------------------------------------
-# ⚡ CACHED: Extract Text (uploaded_file OR sample text)
-# ----------------------------------------------------
-@st.cache_data(show_spinner=False)
-def cached_extract_text_from_upload(uploaded_file):
-    """Extract text from an uploaded file."""
-    return extract_text_from_file(uploaded_file)
+# Pages parsed for the instant preview; the rest stream in on "Analyze"
+PREVIEW_PAGES = 2
 
 
+# ----------------------------------------------------
+# ⚡ CACHED: Sample text (uploads are cached per file hash by open_document)
+# ----------------------------------------------------
 @st.cache_data(show_spinner=False)
 def cached_extract_text_from_sample(sample_path):
     """Read text from a bundled curriculum sample."""
@@ -62,6 +60,8 @@ def planner_tab():
     preview_container = st.container()
     structure_container = st.container()
 
+    document = open_document(uploaded_file) if uploaded_file else None
+
     # -----------------------------------------------
     # PROCESS BUTTON
     # -----------------------------------------------
@@ -74,12 +74,17 @@ def planner_tab():
                 st.session_state["curriculum_text"] = text
                 st.session_state["curriculum_source"] = "sample"
 
-        # OPTION B — UPLOADED FILE
+        # OPTION B — UPLOADED FILE (pages stream in; already-read pages are cached)
         else:
-            with st.spinner("📄 Reading curriculum…"):
-                text = cached_extract_text_from_upload(uploaded_file)
-                st.session_state["curriculum_text"] = text
-                st.session_state["curriculum_source"] = uploaded_file.name
+            total = document.page_count
+            progress = st.progress(0.0, text="📄 Reading curriculum…")
+            for i, _ in document.iter_pages():
+                progress.progress((i + 1) / total, text=f"📄 Reading page {i + 1} of {total}…")
+            progress.empty()
+
+            text = document.text()
+            st.session_state["curriculum_text"] = text
+            st.session_state["curriculum_source"] = uploaded_file.name
 
         # STRUCTURE USING AI
         with st.spinner("🧠 Understanding curriculum…"):
@@ -91,7 +96,13 @@ def planner_tab():
     # -----------------------------------------------
     # RAW TEXT PREVIEW
     # -----------------------------------------------
-    if st.session_state["curriculum_text"]:
+    if document and st.session_state["curriculum_source"] != uploaded_file.name:
+        # Fresh upload: preview from the first pages only
+        with preview_container:
+            st.subheader(f"📄 Preview ({uploaded_file.name}, first {min(PREVIEW_PAGES, document.page_count)} of {document.page_count} pages)")
+            st.text(document.text(max_pages=PREVIEW_PAGES)[:2000])
+
+    elif st.session_state["curriculum_text"]:
         with preview_container:
             source = st.session_state["curriculum_source"]
             st.subheader(f"📄 Raw Text Preview ({source})")
@@ -0,0 +1,196 @@
+"""
+Classroom batch assessment - score a zip of recordings against one passage
+"""
+import os
+import time
+import zipfile
+import threading
+from io import BytesIO
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+
+import numpy as np
+
+from src.modules.speaking.coach import SpeechCoach, articulation_tip
+from src.utils.analyzer import detect_errors
+
+AUDIO_EXTENSIONS = {".wav", ".mp3", ".m4a", ".ogg", ".webm", ".flac"}
+
+# Uncompressed size limits, checked before anything is read from the zip
+MAX_RECORDING_MB = 25        # the transcription API's upload limit
+MAX_BATCH_MB = 500
+
+
+# ============================================================
+# 📦 ZIP → RECORDINGS
+# ============================================================
+def read_recordings(zip_bytes: bytes) -> list:
+    """
+    Returns [(student_name, audio_bytes)] for every audio file in the zip.
+    Raises ValueError when a recording or the whole batch is over the size limits.
+    """
+    recordings = []
+
+    with zipfile.ZipFile(BytesIO(zip_bytes)) as archive:
+        entries = []
+        for info in archive.infolist():
+            name = info.filename
+            if info.is_dir() or name.startswith("__MACOSX/") or os.path.basename(name).startswith("."):
+                continue
+
+            stem, ext = os.path.splitext(os.path.basename(name))
+            if ext.lower() in AUDIO_EXTENSIONS:
+                if info.file_size > MAX_RECORDING_MB * 1024 * 1024:
+                    raise ValueError(f"{name} is larger than {MAX_RECORDING_MB} MB.")
+                entries.append((stem, info))
+
+        if sum(info.file_size for _, info in entries) > MAX_BATCH_MB * 1024 * 1024:
+            raise ValueError(f"The recordings add up to more than {MAX_BATCH_MB} MB.")
+
+        for stem, info in entries:
+            # Read at most the declared size, in case the header understates it
+            with archive.open(info) as f:
+                data = f.read(info.file_size + 1)
+            if len(data) > info.file_size:
+                raise ValueError(f"{info.filename} is larger than its zip entry says.")
+            recordings.append((stem, data))
+
+    return sorted(recordings, key=lambda r: r[0].lower())
+
+
+# ============================================================
+# 🧠 SHARED SCORING (expected words embedded once for the class)
+# ============================================================
+class SharedScorer:
+    """
+    Pronunciation scoring with one word-embedding cache for the whole batch.
+    The passage is embedded with the first student's words (and retried with
+    the next student's if that call fails); each student only embeds words
+    nobody has said yet. A word already being embedded for another student
+    is waited for, not requested again.
+    """
+
+    def __init__(self, client, expected_text: str, api_slots=None):
+        self.client = client
+        self.expected_words = expected_text.lower().split()
+        self.api_slots = api_slots or threading.Semaphore(4)
+        self._vectors = {}
+        self._pending = {}       # word -> Future of the call embedding it
+        self._lock = threading.Lock()
+
+    def _embed(self, words):
+        with self._lock:
+            words = {w for w in words if w not in self._vectors}
+            waiting = {self._pending[w] for w in words if w in self._pending}
+            missing = sorted(w for w in words if w not in self._pending)
+            call = Future()
+            for w in missing:
+                self._pending[w] = call
+
+        if missing:
+            try:
+                with self.api_slots:
+                    data = self.client.embeddings.create(
+                        model="text-embedding-3-small",
+                        input=missing
+                    ).data
+
+                vectors = np.array([d.embedding for d in data], dtype=np.float32)
+                vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+                with self._lock:
+                    self._vectors.update(zip(missing, vectors))
+                call.set_result(None)
+            except Exception as e:
+                call.set_exception(e)
+                raise
+            finally:
+                # Failed words can be retried by the next student
+                with self._lock:
+                    for w in missing:
+                        self._pending.pop(w, None)
+
+        for other in waiting:
+            other.result()
+
+    def score(self, transcript: str):
+        spoken = transcript.lower().split()
+        self._embed(self.expected_words + spoken)
+
+        pairs = list(zip(self.expected_words, spoken))
+        scores = []
+        tips = []
+
+        if pairs:
+            exp_mat = np.stack([self._vectors[e] for e, _ in pairs])
+            spk_mat = np.stack([self._vectors[s] for _, s in pairs])
+            sims = (np.einsum("ij,ij->i", exp_mat, spk_mat) + 1) / 2  # normalize to 0–1
+
+            for (exp, _), sim in zip(pairs, sims.tolist()):
+                scores.append((exp, sim))
+                if sim < 0.65:
+                    tips.append(articulation_tip(exp))
+
+        # Words the student never reached
+        for exp in self.expected_words[len(pairs):]:
+            scores.append((exp, 0.0))
+            tips.append(f"Try pronouncing **{exp}** clearly.")
+
+        return scores, tips
+
+
+# ============================================================
+# 🏫 BATCH ASSESSMENT
+# ============================================================
+def assess_batch(client, recordings, expected_text, audio_pool=None, max_transcriptions=6):
+    """
+    Score every recording against `expected_text`, yielding one row per
+    student as soon as it finishes (completion order, not input order).
+
+    - Enhance + trim run as one task per recording on the shared audio pool,
+      holding at most `workers` slots so interactive users still get a place in the queue
+    - Transcription and embedding calls share `max_transcriptions` slots
+    """
+    coach = SpeechCoach(client, audio_pool=audio_pool)
+    api_slots = threading.Semaphore(max_transcriptions)
+    enhance_slots = threading.Semaphore(audio_pool.max_workers if audio_pool else 2)
+    scorer = SharedScorer(client, expected_text, api_slots=api_slots)
+    expected_count = max(1, len(scorer.expected_words))
+
+    def assess_one(student, audio_bytes):
+        start = time.time()
+        row = {"student": student}
+
+        try:
+            with enhance_slots:
+                if audio_pool is not None:
+                    speech = audio_pool.prepare(audio_bytes, patient=True)
+                else:
+                    speech = coach.trim_audio(coach.enhance_audio(audio_bytes))
+
+            with api_slots:
+                transcript = coach.transcribe_audio(speech)
+
+            errors = detect_errors(expected_text, transcript)
+            scores, _ = scorer.score(transcript)
+            fluency = speech.fluency()
+            minutes = fluency["speaking_seconds"] / 60
+
+            row.update({
+                "accuracy_%": round(100 * (1 - len(errors) / expected_count), 1),
+                "pronunciation_%": round(100 * float(np.mean([s for _, s in scores])), 1) if scores else 0.0,
+                "words_per_minute": round(len(transcript.split()) / minutes, 1) if minutes else 0.0,
+                "long_pauses": fluency["long_pause_count"],
+                "words_to_practice": ", ".join(errors),
+                "transcript": transcript,
+                "status": "ok",
+            })
+        except Exception as e:
+            row["status"] = f"error: {e}"
+
+        row["seconds"] = round(time.time() - start, 2)
+        return row
+
+    with ThreadPoolExecutor(max_workers=min(64, max(1, len(recordings))), thread_name_prefix="classroom") as pool:
+        futures = [pool.submit(assess_one, student, audio) for student, audio in recordings]
+        for future in as_completed(futures):
+            yield future.result()
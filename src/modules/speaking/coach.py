@@ -1,7 +1,26 @@
+import json
+import time
+from difflib import SequenceMatcher
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
 import numpy as np
 from src.utils.analyzer import detect_errors
 from src.utils.feedback import safe_child_friendly_feedback
-from src.utils.audio_cleaner import clean_audio
+from src.utils.vad import VadResult
+from src.services.audio_pool import AudioPoolBusy
+from src.services.dictionary import pronounce
+
+# Network-bound pipeline stages share one thread pool per process
+_PIPELINE = ThreadPoolExecutor(max_workers=16, thread_name_prefix="speech-pipeline")
+
+# A raw-audio transcript matching the passage at least this well is used as is
+GOOD_MATCH = 0.6
+
+
+def transcript_match(expected_text, transcript):
+    """0–1 word-level similarity between the passage and a transcript."""
+    return SequenceMatcher(None, expected_text.lower().split(), transcript.lower().split()).ratio()
 
 # ============================================================
 # 🔤 PHONEME TIPS
@@ -15,6 +34,42 @@ PHONEME_TIPS = {
 }
 
 
+def articulation_tip(word):
+    ipa = pronounce(word)
+    sounds = f" (/{ipa}/)" if ipa else ""
+    for ph, tip in PHONEME_TIPS.items():
+        if ph in word:
+            return f"For **{word}**{sounds}, {tip}"
+    return f"Try saying **{word}**{sounds} slowly and clearly."
+
+
+# ============================================================
+# 📘 PASSAGE DIFFICULTY RULES
+# ============================================================
+PASSAGE_RULES = {
+    "Easy": "Use simple words, short sentences, concrete ideas.",
+    "Medium": "Use richer vocabulary and descriptive words.",
+    "Hard": "Use advanced vocabulary and complex structure.",
+    "Give Me God Of War": "Use epic, mythic, dramatic storytelling."
+}
+
+
+# ============================================================
+# 🧾 ANALYSIS RESULT
+# ============================================================
+@dataclass
+class SpeakingAnalysis:
+    transcript: str = None
+    transcript_source: str = None        # "raw", or "enhanced" when it was needed and matched better
+    enhanced_audio: object = None
+    fluency: dict = None
+    errors: list = None
+    feedback: str = None
+    scores: list = None
+    tips: list = None
+    timings: dict = field(default_factory=dict)   # stage -> seconds
+
+
 # ============================================================
 # ⚡ Cosine Similarity (safe)
 # ============================================================
@@ -35,26 +90,40 @@ class SpeechCoach:
     - Minimal OpenAI calls
     """
 
-    def __init__(self, client):
+    def __init__(self, client, audio_pool=None, passage_bank=None):
         self.client = client
+        self.audio_pool = audio_pool
+        self.passage_bank = passage_bank
 
     # -------------------------------------------------------
-    # 📘 PASSAGE GENERATION (fast)
+    # 📘 PASSAGE GENERATION (banked, live fallback)
     # -------------------------------------------------------
-    def generate_passage(self, grade, difficulty):
-        rules = {
-            "Easy": "Use simple words, short sentences, concrete ideas.",
-            "Medium": "Use richer vocabulary and descriptive words.",
-            "Hard": "Use advanced vocabulary and complex structure.",
-            "Give Me God Of War": "Use epic, mythic, dramatic storytelling."
-        }
+    def generate_passage(self, grade, difficulty, seen=None):
+        """
+        Serve a passage from the bank (unseen by this session when possible),
+        falling back to a live call when the bucket is empty.
+        """
+        if self.passage_bank is not None:
+            banked = self.passage_bank.take((grade, difficulty), seen=seen)
+            if banked:
+                return banked[0]
+
+        passage = self._generate_live_passage(grade, difficulty)
 
+        if self.passage_bank is not None:
+            self.passage_bank.add((grade, difficulty), [passage])
+            if seen is not None:
+                seen.add(self.passage_bank.identity(passage))
+
+        return passage
+
+    def _generate_live_passage(self, grade, difficulty):
         prompt = f"""
         Create a reading passage for Grade {grade}.
         Length: 1–2 sentences, 30–40 words.
         Tone: cheerful.
         Difficulty: {difficulty}
-        Rules: {rules[difficulty]}
+        Rules: {PASSAGE_RULES[difficulty]}
         """
 
         res = self.client.chat.completions.create(
@@ -67,19 +136,63 @@ class SpeechCoach:
 
         return res.choices[0].message.content.strip()
 
+    def generate_passages(self, grade, difficulty, n=4):
+        """Generate several distinct passages in one call (used to stock the bank)."""
+        prompt = f"""
+        Create {n} different reading passages for Grade {grade}.
+        Each passage: 1–2 sentences, 30–40 words, a different topic.
+        Tone: cheerful.
+        Difficulty: {difficulty}
+        Rules: {PASSAGE_RULES[difficulty]}
+        Return JSON: {{"passages": ["...", "..."]}}
+        """
+
+        res = self.client.chat.completions.create(
+            model="gpt-4.1-mini",
+            response_format={"type": "json_object"},
+            temperature=0.9,
+            messages=[
+                {"role": "system", "content": "You generate leveled reading passages for students."},
+                {"role": "user", "content": prompt}
+            ]
+        )
+
+        try:
+            passages = json.loads(res.choices[0].message.content).get("passages", [])
+        except (ValueError, AttributeError):
+            return []
+
+        return [str(p).strip() for p in passages if str(p).strip()]
+
     # -------------------------------------------------------
-    # 🎧 AUDIO ENHANCEMENT (lazy-load heavy libs)
+    # 🎧 AUDIO ENHANCEMENT (off-thread when a pool is available)
     # -------------------------------------------------------
     def enhance_audio(self, audio_bytes):
+        if self.audio_pool is not None:
+            return self.audio_pool.enhance(audio_bytes)
+
+        from src.utils.audio_cleaner import clean_audio
         return clean_audio(audio_bytes)
 
     # -------------------------------------------------------
-    # 🔄 TRANSCRIPTION
+    # ✂️ VOICE-ACTIVITY TRIMMING (smaller uploads, pause data)
+    # -------------------------------------------------------
+    def trim_audio(self, audio):
+        audio_bytes = audio.getvalue() if hasattr(audio, "getvalue") else audio
+        if self.audio_pool is not None:
+            return self.audio_pool.trim(audio_bytes)
+
+        from src.utils.vad import prepare_speech
+        return prepare_speech(audio_bytes)
+
+    # -------------------------------------------------------
+    # 🔄 TRANSCRIPTION (FLAC upload of trimmed speech)
     # -------------------------------------------------------
-    def transcribe_audio(self, enhanced_bytes):
+    def transcribe_audio(self, audio):
+        vad = audio if isinstance(audio, VadResult) else self.trim_audio(audio)
         return self.client.audio.transcriptions.create(
             model="gpt-4o-transcribe",
-            file=("enhanced.wav", enhanced_bytes, "audio/wav")
+            file=vad.encode("flac")
         ).text
 
     # -------------------------------------------------------
@@ -138,12 +251,136 @@ class SpeechCoach:
             scores.append((exp, score))
     
             if score < 0.65:
-                for ph, tip in PHONEME_TIPS.items():
-                    if ph in exp:
-                        suggestions.append(f"For **{exp}**, {tip}")
-                        break
-                else:
-                    suggestions.append(f"Try saying **{exp}** slowly and clearly.")
+                suggestions.append(articulation_tip(exp))
     
         return scores, suggestions
 
+    # -------------------------------------------------------
+    # 🚀 PIPELINED ANALYSIS
+    # -------------------------------------------------------
+    def _timed(self, result, stage, fn, *args):
+        start = time.time()
+        try:
+            return fn(*args)
+        finally:
+            result.timings[stage] = round(time.time() - start, 3)
+
+    def _transcribe_with_fluency(self, audio):
+        try:
+            speech = self.trim_audio(audio)
+        except AudioPoolBusy:
+            # Pool saturated: upload untrimmed audio rather than wait
+            audio_bytes = audio.getvalue() if hasattr(audio, "getvalue") else audio
+            text = self.client.audio.transcriptions.create(
+                model="gpt-4o-transcribe",
+                file=("speech.wav", audio_bytes, "audio/wav")
+            ).text
+            return text, None
+        return self.transcribe_audio(speech), speech.fluency()
+
+    def analyze(self, audio_bytes, expected_text, on_update=None):
+        """
+        Overlapped analysis of one recording:
+        - Raw audio is transcribed while enhancement runs
+        - The enhanced audio is only transcribed when the raw transcription
+          fails or matches the passage poorly (the closer match is kept)
+        - Feedback and pronunciation scoring run concurrently
+        - `on_update(stage, result)` fires on the calling thread as each stage lands
+        Raises AudioPoolBusy when no transcript could be made and the audio pool was saturated.
+        """
+        result = SpeakingAnalysis()
+        start = time.time()
+
+        def notify(stage):
+            if on_update is not None:
+                on_update(stage, result)
+
+        running = {
+            _PIPELINE.submit(self._timed, result, "enhance", self.enhance_audio, audio_bytes): "enhance",
+            _PIPELINE.submit(self._timed, result, "transcribe_raw", self._transcribe_with_fluency, audio_bytes): "raw",
+        }
+        errors = {}
+        fallback = None          # low-match raw transcript, kept if the enhanced one isn't closer
+        need_enhanced = False
+
+        def transcribe_enhanced():
+            running[_PIPELINE.submit(
+                self._timed, result, "transcribe_enhanced",
+                self._transcribe_with_fluency, result.enhanced_audio,
+            )] = "enhanced"
+
+        def accept(source, text, fluency):
+            result.transcript, result.fluency = text, fluency
+            result.transcript_source = source
+            result.timings["transcript_ready"] = round(time.time() - start, 3)
+            notify("transcript")
+
+            running[_PIPELINE.submit(
+                self._timed, result, "feedback",
+                self.evaluate_transcript, expected_text, text,
+            )] = "feedback"
+            running[_PIPELINE.submit(
+                self._timed, result, "score",
+                self.phoneme_score, expected_text, text,
+            )] = "score"
+
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                stage = running.pop(future)
+                error = future.exception()
+                if error is not None and stage in ("enhance", "raw", "enhanced"):
+                    errors[stage] = error
+                    if stage == "raw":
+                        need_enhanced = True
+                        if result.enhanced_audio is not None:
+                            transcribe_enhanced()
+                    continue
+
+                if stage == "enhance":
+                    result.enhanced_audio = future.result()
+                    notify("enhanced")
+                    if need_enhanced:
+                        transcribe_enhanced()
+
+                elif stage == "raw":
+                    text, fluency = future.result()
+                    if transcript_match(expected_text, text) >= GOOD_MATCH:
+                        accept("raw", text, fluency)
+                    else:
+                        fallback, need_enhanced = (text, fluency), True
+                        if result.enhanced_audio is not None:
+                            transcribe_enhanced()
+
+                elif stage == "enhanced":
+                    text, fluency = future.result()
+                    if fallback and transcript_match(expected_text, fallback[0]) >= transcript_match(expected_text, text):
+                        accept("raw", *fallback)
+                    else:
+                        accept("enhanced", text, fluency)
+
+                elif stage == "feedback":
+                    result.errors, result.feedback = future.result()
+                    notify("feedback")
+
+                elif stage == "score":
+                    result.scores, result.tips = future.result()
+                    notify("scores")
+
+            # Finished once feedback + scores are in; a still-running enhancement isn't waited on
+            if result.feedback is not None and result.scores is not None:
+                break
+
+            # Nothing left that could produce a (better) transcript
+            if result.transcript is None and not any(
+                stage in ("enhance", "raw", "enhanced") for stage in running.values()
+            ):
+                if fallback is None:
+                    busy = errors.get("enhance") if isinstance(errors.get("enhance"), AudioPoolBusy) else None
+                    raise busy or errors.get("raw") or errors.get("enhanced") or errors.get("enhance") \
+                        or RuntimeError("Transcription failed.")
+                accept("raw", *fallback)
+
+        result.timings["total"] = round(time.time() - start, 3)
+        return result
@@ -0,0 +1,29 @@
+"""
+Pre-generated reading passages keyed by (grade, difficulty)
+"""
+import os
+import streamlit as st
+
+from src.services.content_bank import ContentBank
+from src.modules.speaking.coach import SpeechCoach, PASSAGE_RULES
+from src.utils.paths import DATA_DIR
+
+GRADES = list(range(1, 13))
+DIFFICULTIES = list(PASSAGE_RULES.keys())
+
+PASSAGE_BANK_PATH = os.path.join(DATA_DIR, "passage_bank.json")
+
+
+@st.cache_resource
+def get_passage_bank(_client):
+    """Process-wide passage bank, refilled in the background."""
+    coach = SpeechCoach(_client)
+
+    bank = ContentBank(
+        path=PASSAGE_BANK_PATH,
+        generate=lambda key: coach.generate_passages(key[0], key[1], n=4),
+        keys=[(g, d) for g in GRADES for d in DIFFICULTIES],
+        low_watermark=4,
+        target=12,
+    )
+    return bank.start_refiller()
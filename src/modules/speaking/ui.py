@@ -1,24 +1,37 @@
+import zipfile
 import streamlit as st
+import pandas as pd
 from src.modules.speaking.coach import SpeechCoach
+from src.modules.speaking.batch import read_recordings, assess_batch
+from src.modules.speaking.passage_bank import get_passage_bank, DIFFICULTIES
+from src.services.audio_pool import get_audio_pool, AudioPoolBusy
 
 # ============================================================
 # 🎤 STREAMLIT UI (Optimized)
 # ============================================================
 def evaluate_speaking(client):
 
-    coach = SpeechCoach(client)
+    audio_pool = get_audio_pool()
+    coach = SpeechCoach(
+        client,
+        audio_pool=audio_pool,
+        passage_bank=get_passage_bank(client),
+    )
 
     # ----------------------------------
     # 📘 Passage Selection
     # ----------------------------------
     grade = st.selectbox("Select Grade Level:", list(range(1, 13)))
-    difficulty = st.selectbox("Difficulty:", ["Easy", "Medium", "Hard", "Give Me God Of War"])
+    difficulty = st.selectbox("Difficulty:", DIFFICULTIES)
 
     if "passage" not in st.session_state:
         st.session_state.passage = ""
+    st.session_state.setdefault("seen_passages", set())
 
     if st.button("Generate Passage"):
-        st.session_state.passage = coach.generate_passage(grade, difficulty)
+        st.session_state.passage = coach.generate_passage(
+            grade, difficulty, seen=st.session_state.seen_passages
+        )
 
     st.subheader("📘 Reading Passage")
     expected_text = st.text_area(
@@ -41,26 +54,47 @@ def evaluate_speaking(client):
             st.warning("⚠️ Please record audio first.")
             st.stop()
 
-        # 1️⃣ Enhance
-        with st.spinner("Enhancing audio…"):
-            enhanced = coach.enhance_audio(audio_file.getvalue())
-        st.audio(enhanced, format="audio/wav")
-
-        # 2️⃣ Transcribe
-        with st.spinner("Transcribing…"):
-            transcript = coach.transcribe_audio(enhanced)
-        st.session_state.transcript = transcript
-
-        # 3️⃣ Errors + Feedback
-        errors, feedback = coach.evaluate_transcript(expected_text, transcript)
-        st.session_state.errors = errors
-        st.session_state.feedback = feedback
+        queued = audio_pool.metrics()["queued"]
+        if queued:
+            st.caption(f"⏳ {queued} reading(s) ahead of you in the audio queue")
+
+        # Stages overlap; each partial result shows up as soon as it lands
+        with st.status("Analyzing reading…", expanded=True) as status:
+
+            def show_progress(stage, result):
+                if stage == "enhanced":
+                    st.audio(result.enhanced_audio, format="audio/wav")
+                elif stage == "transcript":
+                    st.write(f"🗣️ **Transcript:** {result.transcript}")
+                elif stage == "feedback":
+                    st.write(f"🔍 Words to practice: {len(result.errors)}")
+                elif stage == "scores":
+                    st.write("🎨 Pronunciation scored")
+
+            try:
+                analysis = coach.analyze(
+                    audio_file.getvalue(), expected_text, on_update=show_progress
+                )
+            except AudioPoolBusy:
+                status.update(label="Audio queue is full", state="error")
+                st.warning("⚠️ Lots of readers right now! Please try again in a moment.")
+                st.stop()
+
+            status.update(
+                label=f"Analysis complete in {analysis.timings['total']:.1f}s",
+                state="complete",
+                expanded=False,
+            )
 
-        # 4️⃣ Pronunciation Scores
-        with st.spinner("Analyzing pronunciation…"):
-            scores, tips = coach.phoneme_score(expected_text, transcript)
-        st.session_state.phoneme_scores = scores
-        st.session_state.phoneme_tips = tips
+        st.session_state.transcript = analysis.transcript
+        st.session_state.errors = analysis.errors
+        st.session_state.feedback = analysis.feedback
+        st.session_state.phoneme_scores = analysis.scores
+        st.session_state.phoneme_tips = analysis.tips
+        if analysis.fluency:
+            st.session_state.fluency = analysis.fluency
+        else:
+            st.session_state.pop("fluency", None)
 
     # ----------------------------------
     # 📄 OUTPUT
@@ -69,6 +103,13 @@ def evaluate_speaking(client):
         st.subheader("🗣️ Transcript")
         st.write(st.session_state.transcript)
 
+    if "fluency" in st.session_state:
+        fluency = st.session_state.fluency
+        st.caption(
+            f"⏱️ Spoke for {fluency['speaking_seconds']}s of {fluency['total_seconds']}s • "
+            f"{fluency['pause_count']} pause(s), {fluency['long_pause_count']} long"
+        )
+
     if "errors" in st.session_state:
         st.subheader("🔍 Words to Practice")
         st.write(st.session_state.errors or "None! 🎉")
@@ -105,3 +146,58 @@ def evaluate_speaking(client):
         for tip in st.session_state.phoneme_tips:
             st.write("• " + tip)
 
+
+# ============================================================
+# 🏫 CLASSROOM BATCH MODE
+# ============================================================
+def classroom_tab(client):
+
+    st.header("🏫 Classroom Reading Assessment")
+    st.markdown("Upload a zip with one recording per student (file name = student name).")
+
+    expected_text = st.text_area(
+        "Passage the class read:",
+        st.session_state.get("passage", ""),
+        height=120,
+        key="classroom_passage",
+    )
+    zip_file = st.file_uploader("Recordings (.zip)", type=["zip"])
+
+    if st.button("Assess Class", type="primary"):
+
+        if not zip_file or not expected_text.strip():
+            st.warning("⚠️ Please add the passage and a zip of recordings.")
+            st.stop()
+
+        try:
+            recordings = read_recordings(zip_file.getvalue())
+        except (ValueError, zipfile.BadZipFile) as e:
+            st.error(f"Couldn't read the zip: {e}")
+            st.stop()
+        if not recordings:
+            st.error("No audio files found in the zip.")
+            st.stop()
+
+        progress = st.progress(0.0, text=f"Assessing {len(recordings)} recordings…")
+        table = st.empty()
+        rows = []
+
+        # Rows stream in as each student finishes
+        for row in assess_batch(client, recordings, expected_text, audio_pool=get_audio_pool()):
+            rows.append(row)
+            progress.progress(len(rows) / len(recordings), text=f"Assessed {len(rows)}/{len(recordings)}")
+            table.dataframe(pd.DataFrame(rows), width="stretch", hide_index=True)
+
+        progress.empty()
+        st.session_state.classroom_results = rows
+
+    if st.session_state.get("classroom_results"):
+        results = pd.DataFrame(st.session_state.classroom_results)
+        st.subheader("📊 Class Results")
+        st.dataframe(results.sort_values("student"), width="stretch", hide_index=True)
+        st.download_button(
+            "⬇️ Download CSV",
+            results.to_csv(index=False).encode("utf-8"),
+            file_name="classroom_reading_results.csv",
+            mime="text/csv",
+        )
@@ -0,0 +1,219 @@
+"""
+Corpus-driven vocabulary: mine grade-level words from the novels library
+"""
+import os
+import re
+import hashlib
+import numpy as np
+import streamlit as st
+from scipy import sparse
+from typing import List, Dict, Optional
+
+from src.modules.curriculum.helpers import extract_text_from_path
+from src.services.dictionary import get_dictionary
+from src.utils.paths import DATA_DIR, PROJECT_ROOT
+
+NOVEL_DIRS = [os.path.join(DATA_DIR, "novels"), os.path.join(PROJECT_ROOT, "novels")]
+
+# Extracted book text, cached by file hash so PDFs are parsed once
+CORPUS_CACHE_DIR = os.path.join(DATA_DIR, "vocab_corpus")
+
+# Optional reference list, one "word count" pair per line (e.g. a subtitle or web corpus)
+FREQUENCY_LIST_PATH = os.path.join(DATA_DIR, "word_frequency.txt")
+
+# Zipf range (log10 occurrences per billion words) each grade band should practise
+GRADE_ZIPF = {
+    "1-3": (3.8, 5.0),
+    "4-6": (3.2, 4.3),
+    "7-9": (2.6, 3.7),
+    "10-12": (1.8, 3.2),
+}
+DIFFICULTY_SHIFT = {"easy": 0.3, "medium": 0.0, "hard": -0.3}
+
+_TOKEN = re.compile(r"[A-Za-z]+(?:'[a-z]+)?")
+_VOWEL_GROUPS = re.compile(r"[aeiouy]+")
+
+
+# ============================================================
+# 📚 BOOKS
+# ============================================================
+def list_novels() -> Dict[str, str]:
+    """{title: pdf path} for every book in data/novels or novels/."""
+    books = {}
+    for novels_dir in NOVEL_DIRS:
+        if not os.path.isdir(novels_dir):
+            continue
+        for name in sorted(os.listdir(novels_dir)):
+            title = os.path.splitext(name)[0].replace("_", " ").title()
+            if name.lower().endswith(".pdf") and title not in books:
+                books[title] = os.path.join(novels_dir, name)
+    return books
+
+
+def book_text(path: str) -> str:
+    """Extracted text of a library book, cached on disk by file hash."""
+    with open(path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+
+    cache_path = os.path.join(CORPUS_CACHE_DIR, f"{digest}.txt")
+    if os.path.exists(cache_path):
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    text = extract_text_from_path(path)
+    os.makedirs(CORPUS_CACHE_DIR, exist_ok=True)
+    with open(cache_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return text
+
+
+def load_frequency_list(path: str = FREQUENCY_LIST_PATH) -> Optional[Dict[str, float]]:
+    """word -> Zipf value, or None when no list is installed."""
+    if not os.path.exists(path):
+        return None
+
+    counts = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2:
+                try:
+                    counts[parts[0].lower()] = counts.get(parts[0].lower(), 0) + float(parts[1])
+                except ValueError:
+                    continue
+
+    total = sum(counts.values()) or 1.0
+    return {w: float(np.log10(c / total * 1e9)) for w, c in counts.items() if c > 0}
+
+
+# ============================================================
+# 🧮 TERM / DOCUMENT FREQUENCY TABLES
+# ============================================================
+class CorpusIndex:
+    """
+    Sparse books x words tables:
+    - `tf`: occurrences of each (lowercased) word per book
+    - `tf_lower`: occurrences written in lowercase (names are mostly capitalized)
+    - `df`: number of books containing each word
+    """
+
+    def __init__(self, books: Dict[str, str], frequency: Optional[Dict[str, float]] = None):
+        self.titles = list(books)
+        self.texts = [books[t] for t in self.titles]
+
+        rows, tokens, lowercase = [], [], []
+        for row, text in enumerate(self.texts):
+            found = _TOKEN.findall(text)
+            rows.append(np.full(len(found), row, dtype=np.int32))
+            tokens.append(np.array([t.lower() for t in found], dtype=object))
+            lowercase.append(np.array([t.islower() for t in found], dtype=bool))
+
+        rows = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int32)
+        all_tokens = np.concatenate(tokens) if tokens else np.zeros(0, dtype=object)
+        lowercase = np.concatenate(lowercase) if lowercase else np.zeros(0, dtype=bool)
+
+        self.vocab, cols = np.unique(all_tokens.astype(str), return_inverse=True)
+        self.word_index = {w: i for i, w in enumerate(self.vocab.tolist())}
+        shape = (len(self.titles), len(self.vocab))
+
+        ones = np.ones(len(cols), dtype=np.int32)
+        self.tf = sparse.csr_matrix((ones, (rows, cols)), shape=shape)
+        self.tf_lower = sparse.csr_matrix((lowercase.astype(np.int32), (rows, cols)), shape=shape)
+        self.df = np.asarray((self.tf > 0).sum(axis=0)).ravel()
+
+        self.zipf = self._zipf(frequency)
+
+    def _zipf(self, frequency) -> np.ndarray:
+        """Zipf value per vocab word, from the reference list or estimated from the corpus."""
+        if frequency:
+            # Words missing from a reference list are rarer than anything in it
+            floor = min(frequency.values()) - 0.5
+            return np.array([frequency.get(w, floor) for w in self.vocab.tolist()])
+
+        # Fallback: corpus frequency, nudged down for long / many-syllable words
+        cf = np.asarray(self.tf.sum(axis=0)).ravel().astype(np.float64)
+        corpus_zipf = np.log10((cf + 1) / max(cf.sum(), 1.0) * 1e9)
+        lengths = np.char.str_len(self.vocab.astype(str))
+        syllables = np.array([max(1, len(_VOWEL_GROUPS.findall(w))) for w in self.vocab.tolist()])
+        return corpus_zipf - 0.15 * np.maximum(0, lengths - 5) - 0.2 * np.maximum(0, syllables - 2)
+
+    # -------------------------------------------------------
+    def candidates(self, title: str, grade: str = "4-6", difficulty: str = "medium",
+                   k: int = 10, exclude=()) -> List[str]:
+        """
+        The `k` best words from one book for a grade band: inside the band's
+        Zipf range, used a few times in the book (salient, tf-idf style),
+        written in lowercase (not names), closest to the band's centre first.
+        """
+        row = self.titles.index(title)
+        low, high = GRADE_ZIPF.get(grade, GRADE_ZIPF["4-6"])
+        shift = DIFFICULTY_SHIFT.get(difficulty, 0.0)
+        low, high = low + shift, high + shift
+
+        tf = self.tf.getrow(row).toarray().ravel().astype(np.float64)
+        tf_lower = self.tf_lower.getrow(row).toarray().ravel()
+        lengths = np.char.str_len(self.vocab.astype(str))
+
+        idf = np.log((1 + len(self.titles)) / (1 + self.df)) + 1
+        centre, width = (low + high) / 2, (high - low) / 2
+        fit = np.exp(-((self.zipf - centre) / width) ** 2)
+
+        eligible = (
+            (tf >= 2)
+            & (tf_lower >= 0.8 * tf)
+            & (lengths >= 4)
+            & (self.zipf >= low) & (self.zipf <= high)
+        )
+        score = np.where(eligible, np.log1p(tf) * idf * fit, 0.0)
+
+        excluded = {e.lower() for e in exclude}
+        chosen, stems = [], set()
+        for i in np.argsort(-score):
+            if score[i] <= 0 or len(chosen) == k:
+                break
+            word = str(self.vocab[i])
+            stem = re.sub(r"(ies|es|s|ed|ing|ly)$", "", word)
+            if word in excluded or stem in stems:
+                continue
+            stems.add(stem)
+            chosen.append(word)
+
+        return chosen
+
+    def example_sentence(self, title: str, word: str, max_chars: int = 220) -> str:
+        """A short sentence from the book that uses `word`."""
+        text = self.texts[self.titles.index(title)]
+        pattern = re.compile(rf"[^.!?\n]*\b{re.escape(word)}\b[^.!?\n]*[.!?]", re.IGNORECASE)
+        best = ""
+        for match in pattern.finditer(text):
+            # Drop the closing quote left over from the previous sentence
+            sentence = " ".join(match.group(0).split()).lstrip("”’\"' ")
+            if 40 <= len(sentence) <= max_chars:
+                return sentence
+            best = best or sentence[:max_chars]
+        return best
+
+
+@st.cache_resource(show_spinner="Indexing the novels library…")
+def get_corpus_index():
+    """Process-wide index of every book in the library."""
+    books = {title: book_text(path) for title, path in list_novels().items()}
+    return CorpusIndex(books, frequency=load_frequency_list())
+
+
+def book_vocabulary(client, title: str, grade: str = "4-6", difficulty: str = "medium",
+                    num_words: int = 10, seen=(), index: CorpusIndex = None):
+    """
+    Words mined from `title` for the grade band. Definitions come from the
+    shared dictionary; only words it lacks are defined, in one LLM call.
+    Yields items with an extra `book_sentence` (the word in the book).
+    """
+    index = index or get_corpus_index()
+    words = index.candidates(title, grade, difficulty, k=num_words, exclude=seen)
+    contexts = {w: index.example_sentence(title, w) for w in words}
+
+    for item in get_dictionary().define_iter(client, words, grade, contexts):
+        key = item["word"].lower()
+        item["book_sentence"] = contexts.get(key, "")
+        item["book"] = title
+        yield item
@@ -1,6 +1,58 @@
 import streamlit as st
 from openai import OpenAI
-from src.modules.vocabulary_builder.vocabulary_builder import generate_vocabulary
+from src.modules.vocabulary_builder.word_pool import get_word_pool, normalize_word
+from src.modules.vocabulary_builder.corpus import list_novels, book_vocabulary
+from src.services.dictionary import pronounce
+
+
+def _render_word(i, word_data, expanded=False, container=st):
+    with container.expander(f"**{i}. {word_data['word'].upper()}** ({word_data['part_of_speech']})", expanded=expanded):
+        ipa = word_data.get('ipa') or pronounce(word_data['word'])
+        if ipa:
+            st.markdown(f"**Pronunciation:** /{ipa}/")
+        st.markdown(f"**Definition:** {word_data['definition']}")
+        st.markdown(f"**Example Sentence:** *{word_data['example_sentence']}*")
+        
+        if word_data.get('synonyms') and len(word_data['synonyms']) > 0:
+            synonyms_text = ", ".join(word_data['synonyms'])
+            st.markdown(f"**Synonyms:** {synonyms_text}")
+        
+        if word_data.get('book_sentence'):
+            st.markdown(f"**📖 In *{word_data.get('book', 'the book')}*:** “{word_data['book_sentence']}”")
+
+
+def _stream_words(client, grade, difficulty, num_words=10, book=None):
+    """
+    Words this session hasn't seen, from the shared pool (instant) or mined
+    from `book`; anything generated is shown word by word as it streams in.
+    Returns the full list.
+    """
+    if "seen_words" not in st.session_state:
+        st.session_state.seen_words = set()
+    
+    slot = st.empty()
+    box = slot.container()
+    shown = []
+    
+    def show(word_data):
+        shown.append(word_data)
+        _render_word(len(shown), word_data, container=box)
+    
+    with st.spinner("Generating vocabulary words..."):
+        if book:
+            words = []
+            for word_data in book_vocabulary(client, book, grade, difficulty, num_words,
+                                             seen=st.session_state.seen_words):
+                st.session_state.seen_words.add(normalize_word(word_data["word"]))
+                words.append(word_data)
+                show(word_data)
+        else:
+            words = get_word_pool(client).take(
+                grade, difficulty, seen=st.session_state.seen_words, k=num_words, on_item=show
+            )
+    
+    slot.empty()
+    return words
 
 
 def vocabulary_builder_tab(client: OpenAI):
@@ -30,15 +82,18 @@ def vocabulary_builder_tab(client: OpenAI):
             help="Select the difficulty level for vocabulary words"
         )
     
+    # Word source: the shared AI word pool, or words mined from a library book
+    novels = list_novels()
+    source = st.radio(
+        "Word source",
+        ["✨ Grade-level word list", "📖 From a book"] if novels else ["✨ Grade-level word list"],
+        horizontal=True,
+    )
+    book = st.selectbox("Book", list(novels)) if source.startswith("📖") else None
+    
     # Generate button
     if st.button("Generate 10 New Words", type="primary"):
-        with st.spinner("Generating vocabulary words..."):
-            vocab_words = generate_vocabulary(
-                client=client,
-                grade=grade,
-                difficulty=difficulty,
-                num_words=10,
-            )
+        vocab_words = _stream_words(client, grade, difficulty, book=book)
         
         if not vocab_words:
             st.error("Could not generate vocabulary words. Please try again.")
@@ -48,6 +103,7 @@ def vocabulary_builder_tab(client: OpenAI):
         st.session_state.vocab_words = vocab_words
         st.session_state.vocab_grade = grade
         st.session_state.vocab_difficulty = difficulty
+        st.session_state.vocab_book = book
         st.success(f"Generated {len(vocab_words)} vocabulary words!")
     
     # Display vocabulary words (from session state)
@@ -56,25 +112,18 @@ def vocabulary_builder_tab(client: OpenAI):
         st.subheader(f"📚 Vocabulary Words ({st.session_state.vocab_grade} Grade, {st.session_state.vocab_difficulty.capitalize()} Difficulty)")
         
         for i, word_data in enumerate(st.session_state.vocab_words, start=1):
-            with st.expander(f"**{i}. {word_data['word'].upper()}** ({word_data['part_of_speech']})", expanded=False):
-                st.markdown(f"**Definition:** {word_data['definition']}")
-                st.markdown(f"**Example Sentence:** *{word_data['example_sentence']}*")
-                
-                if word_data.get('synonyms') and len(word_data['synonyms']) > 0:
-                    synonyms_text = ", ".join(word_data['synonyms'])
-                    st.markdown(f"**Synonyms:** {synonyms_text}")
+            _render_word(i, word_data)
         
         st.markdown("---")
         
         # Option to generate new words
         if st.button("Generate New Set of Words", type="secondary"):
-            with st.spinner("Generating new vocabulary words..."):
-                vocab_words = generate_vocabulary(
-                    client=client,
-                    grade=st.session_state.vocab_grade,
-                    difficulty=st.session_state.vocab_difficulty,
-                    num_words=10,
-                )
+            vocab_words = _stream_words(
+                client,
+                st.session_state.vocab_grade,
+                st.session_state.vocab_difficulty,
+                book=st.session_state.get("vocab_book"),
+            )
             
             if vocab_words:
                 st.session_state.vocab_words = vocab_words
@@ -1,16 +1,18 @@
-import json
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
 from openai import OpenAI
 import textwrap
-import re
+
+from src.services.dictionary import normalize_entry
+from src.utils.json_stream import stream_chat_objects
 
 
 # ----------------------------------------------------------
 # Construct prompt for vocabulary generation
 # ----------------------------------------------------------
-def _build_vocabulary_prompt(grade: str, difficulty: str, num_words: int = 10) -> str:
+def _build_vocabulary_prompt(grade: str, difficulty: str, num_words: int = 10, avoid=None) -> str:
     """
     Build a prompt for generating vocabulary words based on grade and difficulty.
+    `avoid` lists words that must not be repeated (already in the pool or seen).
     """
     
     # Grade-specific guidance
@@ -28,6 +30,10 @@ def _build_vocabulary_prompt(grade: str, difficulty: str, num_words: int = 10) -
         "hard": "Use advanced words that are challenging and expand vocabulary significantly. Include sophisticated and academic terms.",
     }
     
+    avoid_rule = ""
+    if avoid:
+        avoid_rule = f"\n- Do NOT use any of these words: {', '.join(sorted(avoid))}."
+    
     grade_rule = grade_guidance.get(grade, grade_guidance["4-6"])
     diff_rule = difficulty_instructions.get(
         difficulty.lower(), difficulty_instructions["medium"]
@@ -44,7 +50,7 @@ RULES:
 - Difficulty: {diff_rule}
 - Make sure words are age-appropriate and educational.
 - Provide clear, concise definitions that students can understand.
-- Example sentences should be clear and demonstrate proper usage.
+- Example sentences should be clear and demonstrate proper usage.{avoid_rule}
 - Return ONLY valid JSON in this format:
 
 [
@@ -67,6 +73,32 @@ Generate exactly {num_words} words. Do not include any text outside the JSON arr
 # ----------------------------------------------------------
 # Generate vocabulary words using OpenAI
 # ----------------------------------------------------------
+def iter_vocabulary(
+    client: OpenAI,
+    grade: str = "4-6",
+    difficulty: str = "medium",
+    num_words: int = 10,
+    avoid=None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Stream vocabulary words: each word is validated and yielded as soon as
+    its JSON object has arrived. A malformed word is skipped, not fatal.
+    """
+    
+    prompt = _build_vocabulary_prompt(grade, difficulty, num_words, avoid=avoid)
+    
+    yield from stream_chat_objects(
+        client,
+        normalize_entry,
+        model="gpt-4o-mini",
+        temperature=0.7,
+        messages=[
+            {"role": "system", "content": "You are an expert vocabulary educator who generates age-appropriate vocabulary words with clear explanations."},
+            {"role": "user", "content": prompt},
+        ],
+    )
+
+
 def generate_vocabulary(
     client: OpenAI,
     grade: str = "4-6",
@@ -86,42 +118,9 @@ def generate_vocabulary(
         List of dictionaries containing word information
     """
     
-    prompt = _build_vocabulary_prompt(grade, difficulty, num_words)
-    
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        temperature=0.7,
-        messages=[
-            {"role": "system", "content": "You are an expert vocabulary educator who generates age-appropriate vocabulary words with clear explanations."},
-            {"role": "user", "content": prompt},
-        ],
-    )
-    
-    raw = response.choices[0].message.content
-    
-    # Try clean direct JSON parse
-    try:
-        vocab_list = json.loads(raw)
-        if isinstance(vocab_list, list):
-            return _normalize_vocabulary(vocab_list)
-    except Exception:
-        pass
-    
-    # Attempt to extract JSON array from noisy output
-    match = re.search(r"\[.*\]", raw, flags=re.DOTALL)
-    if match:
-        try:
-            vocab_list = json.loads(match.group(0))
-            return _normalize_vocabulary(vocab_list)
-        except Exception:
-            return []
-    
-    return []
+    return list(iter_vocabulary(client, grade, difficulty, num_words))
 
 
-# ----------------------------------------------------------
-# Normalize + validate vocabulary objects
-# ----------------------------------------------------------
 def _normalize_vocabulary(vocab: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
     Normalize and validate vocabulary word objects.
@@ -130,28 +129,8 @@ def _normalize_vocabulary(vocab: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     cleaned = []
     
     for item in vocab:
-        word = str(item.get("word", "")).strip()
-        part_of_speech = str(item.get("part_of_speech", "")).strip()
-        definition = str(item.get("definition", "")).strip()
-        example_sentence = str(item.get("example_sentence", "")).strip()
-        synonyms = item.get("synonyms", [])
-        
-        if not word or not definition:
-            continue
-        
-        # Ensure synonyms is a list
-        if not isinstance(synonyms, list):
-            synonyms = []
-        
-        cleaned.append(
-            {
-                "word": word,
-                "part_of_speech": part_of_speech or "unknown",
-                "definition": definition,
-                "example_sentence": example_sentence or f"Example: The word '{word}' is used in context.",
-                "synonyms": [str(s).strip() for s in synonyms if s],
-            }
-        )
+        word = normalize_entry(item) if isinstance(item, dict) else None
+        if word is not None:
+            cleaned.append(word)
     
     return cleaned
-
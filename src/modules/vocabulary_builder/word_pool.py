@@ -0,0 +1,102 @@
+"""
+Pre-stocked vocabulary word pools keyed by (grade band, difficulty)
+"""
+import os
+import re
+import streamlit as st
+
+from src.services.content_bank import ContentBank
+from src.services.dictionary import get_dictionary
+from src.modules.vocabulary_builder.vocabulary_builder import iter_vocabulary
+from src.utils.paths import DATA_DIR
+
+GRADE_BANDS = ["1-3", "4-6", "7-9", "10-12"]
+DIFFICULTIES = ["easy", "medium", "hard"]
+
+WORD_POOL_PATH = os.path.join(DATA_DIR, "word_pool.json")
+
+# Words generated per refill call
+REFILL_BATCH = 15
+
+# Most words named in an "avoid" list (keeps prompts short)
+MAX_AVOID = 150
+
+
+def normalize_word(word: str) -> str:
+    """Index key for dedup: lowercase, punctuation dropped ("Ancient!" == "ancient")."""
+    return " ".join(re.sub(r"[^\w\-' ]", "", str(word).lower()).split())
+
+
+def _word_identity(item) -> str:
+    return normalize_word(item.get("word", "")) if isinstance(item, dict) else normalize_word(item)
+
+
+class WordPool:
+    """
+    Serves sets of words a session hasn't seen from a persistent pool.
+    A short pool is topped up live (streamed) and then in the background.
+    """
+
+    def __init__(self, client, path: str = WORD_POOL_PATH):
+        self.client = client
+        self.bank = ContentBank(
+            path=path,
+            generate=self._refill,
+            keys=[(g, d) for g in GRADE_BANDS for d in DIFFICULTIES],
+            identity=_word_identity,
+            low_watermark=30,
+            target=60,
+            max_size=400,
+        )
+
+    def _avoid(self, key, seen=()) -> set:
+        """
+        Up to MAX_AVOID words from this pool: the ones this session has seen
+        come first, then the newest. `seen` spans every pool, so only its
+        words from this one count.
+        """
+        newest = [_word_identity(w) for w in reversed(self.bank.items(key))]
+        ordered = [w for w in newest if w in seen] + [w for w in newest if w not in seen]
+        return set(ordered[:MAX_AVOID])
+
+    def _refill(self, key) -> list:
+        grade, difficulty = key
+        words = list(iter_vocabulary(self.client, grade, difficulty, REFILL_BATCH, avoid=self._avoid(key)))
+        get_dictionary().add_entries(words, grade)
+        return words
+
+    def take(self, grade: str, difficulty: str, seen: set, k: int = 10, on_item=None) -> list:
+        """
+        `k` words not in `seen` (normalized words; updated in place). Pool
+        words come back instantly; any shortfall streams in live, each word
+        passed to `on_item` as it arrives, and is added to the pool.
+        """
+        key = (grade, difficulty)
+        words = self.bank.take(key, seen=seen, k=k)
+        if on_item:
+            for w in words:
+                on_item(w)
+
+        if len(words) < k:
+            fresh = []
+            for w in iter_vocabulary(self.client, grade, difficulty, k - len(words) + 2,
+                                     avoid=self._avoid(key, seen)):
+                fresh.append(w)
+                ident = _word_identity(w)
+                if len(words) < k and ident not in seen:
+                    seen.add(ident)
+                    words.append(w)
+                    if on_item:
+                        on_item(w)
+            self.bank.add(key, fresh)
+            get_dictionary().add_entries(fresh, grade)
+
+        return words
+
+
+@st.cache_resource
+def get_word_pool(_client):
+    """Process-wide word pool, refilled in the background."""
+    pool = WordPool(_client)
+    pool.bank.start_refiller()
+    return pool
@@ -0,0 +1,163 @@
+"""
+Shared process pool for CPU-bound audio work (noise reduction, alignment, scoring)
+"""
+import os
+import time
+import threading
+import multiprocessing
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor
+
+import streamlit as st
+
+
+# ============================================================
+# 🔥 WORKER SIDE (runs inside the pool processes)
+# ============================================================
+def _warm_worker():
+    """Import the heavy audio stack once per worker process."""
+    import librosa  # noqa: F401
+    import noisereduce  # noqa: F401
+    import src.utils.audio_cleaner  # noqa: F401
+    import src.utils.vad  # noqa: F401
+
+
+def _ping():
+    return os.getpid()
+
+
+def _enhance_job(audio_bytes: bytes) -> bytes:
+    from src.utils.audio_cleaner import clean_audio
+    return clean_audio(audio_bytes).getvalue()
+
+
+def _trim_job(audio_bytes: bytes):
+    from src.utils.vad import prepare_speech
+    return prepare_speech(audio_bytes)
+
+
+def _prepare_job(audio_bytes: bytes):
+    """Enhance then trim in one task, so the audio crosses the process boundary once."""
+    from src.utils.audio_cleaner import clean_audio
+    from src.utils.vad import prepare_speech
+    return prepare_speech(clean_audio(audio_bytes).getvalue())
+
+
+# ============================================================
+# 🚦 BACKPRESSURE
+# ============================================================
+class AudioPoolBusy(RuntimeError):
+    """Raised when the audio queue is full and the caller should retry later."""
+
+
+# ============================================================
+# 🎛️ AUDIO POOL
+# ============================================================
+class AudioPool:
+    """
+    Process pool with a bounded queue:
+    - Warm workers (librosa + noisereduce already imported)
+    - Submissions beyond workers + max_queue wait up to `wait_timeout`, then fail fast
+    - Queue-depth metrics for the UI
+    """
+
+    def __init__(self, max_workers: int = None, max_queue: int = None, wait_timeout: float = 2.0):
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.max_queue = max_queue if max_queue is not None else self.max_workers * 4
+        self.wait_timeout = wait_timeout
+
+        # "spawn" keeps workers independent of the Streamlit server's threads
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_warm_worker,
+        )
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queue)
+
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._total_seconds = 0.0
+
+        # Start every worker now so the first request doesn't pay the import cost
+        for _ in range(self.max_workers):
+            self._executor.submit(_ping)
+
+    # -------------------------------------------------------
+    def submit(self, fn, *args, patient=False):
+        """
+        Submit a picklable job, applying backpressure when the queue is full.
+        `patient` callers (batch jobs) wait for a slot instead of failing fast.
+        """
+        if not self._slots.acquire(timeout=None if patient else self.wait_timeout):
+            with self._lock:
+                self._rejected += 1
+            raise AudioPoolBusy("Audio queue is full, please try again in a moment.")
+
+        start = time.time()
+        with self._lock:
+            self._in_flight += 1
+            self._submitted += 1
+
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._release(start, failed=True)
+            raise
+
+        # Futures cancelled at shutdown have no exception to ask for
+        future.add_done_callback(
+            lambda f: self._release(start, failed=f.cancelled() or f.exception() is not None)
+        )
+        return future
+
+    def _release(self, start, failed=False):
+        with self._lock:
+            self._in_flight -= 1
+            if failed:
+                self._failed += 1
+            else:
+                self._completed += 1
+                self._total_seconds += time.time() - start
+        self._slots.release()
+
+    # -------------------------------------------------------
+    def enhance(self, audio_bytes: bytes, patient=False) -> BytesIO:
+        """Blocking helper: noise-reduce audio in a worker process."""
+        return BytesIO(self.submit(_enhance_job, audio_bytes, patient=patient).result())
+
+    def trim(self, audio_bytes: bytes, patient=False):
+        """Blocking helper: VAD-trim audio in a worker process (returns VadResult)."""
+        return self.submit(_trim_job, audio_bytes, patient=patient).result()
+
+    def prepare(self, audio_bytes: bytes, patient=False):
+        """Blocking helper: enhance + VAD-trim in one worker task (returns VadResult)."""
+        return self.submit(_prepare_job, audio_bytes, patient=patient).result()
+
+    # -------------------------------------------------------
+    def metrics(self) -> dict:
+        with self._lock:
+            done = self._completed
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "queued": max(0, self._in_flight - self.max_workers),
+                "submitted": self._submitted,
+                "completed": done,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "avg_seconds": (self._total_seconds / done) if done else 0.0,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+@st.cache_resource
+def get_audio_pool():
+    """Get the process-wide audio pool (shared by every session)"""
+    return AudioPool()
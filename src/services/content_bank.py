@@ -0,0 +1,252 @@
+"""
+Disk-persisted banks of pre-generated content with a background refiller
+"""
+import os
+import json
+import time
+import atexit
+import random
+import threading
+
+
+def _default_identity(item) -> str:
+    if isinstance(item, str):
+        return " ".join(item.lower().split())
+    return json.dumps(item, sort_keys=True)
+
+
+class ContentBank:
+    """
+    Buckets of generated items keyed by a tuple (e.g. (grade, difficulty)).
+
+    - Persisted as one JSON file, written atomically; adds within
+      `save_delay` seconds share one write (pending writes are flushed at exit)
+    - Items deduped by `identity(item)`; each bucket keeps its newest
+      `max_size` items and, with `max_buckets`, the least recently used
+      buckets are dropped (and no longer refilled)
+    - `take()` prefers items the caller has not seen yet
+    - A daemon thread tops up buckets that fall below `low_watermark`
+    """
+
+    def __init__(
+        self,
+        path: str,
+        generate,
+        keys=(),
+        low_watermark: int = 3,
+        target: int = 8,
+        max_size: int = 50,
+        identity=_default_identity,
+        refill_pause: float = 1.0,
+        save_delay: float = 2.0,
+        max_buckets: int = None,
+    ):
+        self.path = path
+        self.generate = generate          # generate(key) -> list of new items
+        self.keys = [tuple(k) for k in keys]
+        self.low_watermark = low_watermark
+        self.target = target
+        self.max_size = max_size
+        self.identity = identity
+        self.refill_pause = refill_pause
+        self.save_delay = save_delay
+        self.max_buckets = max_buckets
+
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()
+        self._save_timer = None
+        self._dirty = False
+        atexit.register(self.flush)
+        self._wake = threading.Event()
+        self._thread = None
+        self._buckets = self._load()
+        self._hits = 0
+        self._misses = 0
+
+    # -------------------------------------------------------
+    # 💾 PERSISTENCE
+    # -------------------------------------------------------
+    @staticmethod
+    def _bucket_name(key) -> str:
+        return "|".join(str(k) for k in key)
+
+    def _load(self) -> dict:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return {name: list(items) for name, items in data.items()}
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        """Schedule a write in `save_delay` seconds; caller holds the lock."""
+        self._dirty = True
+        if self._save_timer is None:
+            self._save_timer = threading.Timer(self.save_delay, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def flush(self):
+        """Write pending changes to disk now."""
+        with self._save_lock:
+            with self._lock:
+                self._save_timer = None
+                if not self._dirty:
+                    return
+                self._dirty = False
+                payload = json.dumps(self._buckets, ensure_ascii=False)
+
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp_path, self.path)
+
+    # -------------------------------------------------------
+    # 📥 READ / WRITE
+    # -------------------------------------------------------
+    def _touch(self, name: str):
+        """Mark a bucket most recently used; caller holds the lock."""
+        if name in self._buckets:
+            self._buckets[name] = self._buckets.pop(name)
+
+    def _evict_buckets(self):
+        """Drop least recently used buckets over `max_buckets`; caller holds the lock."""
+        if not self.max_buckets:
+            return
+        while len(self._buckets) > self.max_buckets:
+            name = next(iter(self._buckets))
+            del self._buckets[name]
+            self.keys = [k for k in self.keys if self._bucket_name(k) != name]
+            self._dirty = True
+
+    def size(self, key) -> int:
+        with self._lock:
+            return len(self._buckets.get(self._bucket_name(key), []))
+
+    def items(self, key) -> list:
+        """Copy of everything stored under `key`."""
+        with self._lock:
+            return list(self._buckets.get(self._bucket_name(key), []))
+
+    def add(self, key, items) -> int:
+        """Add new items to a bucket, skipping duplicates. Returns the number added."""
+        name = self._bucket_name(key)
+        added = 0
+
+        with self._lock:
+            bucket = self._buckets.setdefault(name, [])
+            self._touch(name)
+            known = {self.identity(i) for i in bucket}
+
+            for item in items:
+                ident = self.identity(item)
+                if not ident or ident in known:
+                    continue
+                bucket.append(item)
+                known.add(ident)
+                added += 1
+
+            # Oldest items fall out first
+            if len(bucket) > self.max_size:
+                del bucket[: len(bucket) - self.max_size]
+
+            if added:
+                self._evict_buckets()
+                self._save()
+
+        return added
+
+    def take(self, key, seen: set = None, k: int = 1) -> list:
+        """
+        Sample up to `k` items the caller has not seen.
+        Identities of returned items are added to `seen`.
+        """
+        seen = seen if seen is not None else set()
+
+        with self._lock:
+            name = self._bucket_name(key)
+            bucket = self._buckets.get(name, [])
+            self._touch(name)
+            fresh = [i for i in bucket if self.identity(i) not in seen]
+
+            if len(fresh) < k:
+                self._misses += 1
+            else:
+                self._hits += 1
+
+        picked = random.sample(fresh, min(k, len(fresh)))
+        seen.update(self.identity(i) for i in picked)
+
+        if self.size(key) < self.low_watermark:
+            self._wake.set()
+
+        return picked
+
+    # -------------------------------------------------------
+    # 🔁 BACKGROUND REFILL
+    # -------------------------------------------------------
+    def track(self, key):
+        """Have the refiller keep `key` stocked from now on (e.g. once it turns out popular)."""
+        key = tuple(key)
+        with self._lock:
+            if key in self.keys:
+                return
+            self.keys.append(key)
+        self._wake.set()
+
+    def untrack(self, key):
+        """Stop refilling `key` (stored items stay servable)."""
+        key = tuple(key)
+        with self._lock:
+            self.keys = [k for k in self.keys if k != key]
+
+    def drop(self, keys):
+        """Forget the buckets under `keys` and stop refilling them."""
+        names = {self._bucket_name(k) for k in keys}
+        if not names:
+            return
+        with self._lock:
+            self.keys = [k for k in self.keys if self._bucket_name(k) not in names]
+            removed = [n for n in names if self._buckets.pop(n, None) is not None]
+            if removed:
+                self._save()
+
+    def refill_once(self, key) -> int:
+        return self.add(key, self.generate(key))
+
+    def _refill_loop(self):
+        while True:
+            for key in list(self.keys):
+                try:
+                    while self.size(key) < self.target:
+                        if not self.refill_once(key):
+                            break
+                        time.sleep(self.refill_pause)
+                except Exception as e:
+                    print("Content bank refill error:", e)
+                    time.sleep(self.refill_pause * 10)
+
+            # Sleep until a bucket runs low (or a periodic check)
+            self._wake.wait(timeout=300)
+            self._wake.clear()
+
+    def start_refiller(self):
+        """Start the daemon refiller once (no-op if already running)."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._refill_loop, name="content-bank-refill", daemon=True
+                )
+                self._thread.start()
+        return self
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "buckets": {name: len(items) for name, items in self._buckets.items()},
+                "hits": self._hits,
+                "misses": self._misses,
+            }
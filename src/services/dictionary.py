@@ -0,0 +1,347 @@
+"""
+Shared dictionary: definitions keyed by (lemma, part of speech, grade band)
+
+Book word lists, speaking tips and the reading tutor read from it; the
+vocabulary word pool stores the words it generates in it. Lookups are
+batched; only words missing from the store go to the LLM, all in one call.
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from functools import lru_cache
+from typing import Optional, Dict, Any
+
+from src.utils.json_stream import stream_chat_objects
+from src.utils.paths import DATA_DIR
+
+DICTIONARY_PATH = os.path.join(DATA_DIR, "dictionary.db")
+
+POS_ALIASES = {
+    "n": "noun", "noun": "noun",
+    "v": "verb", "verb": "verb",
+    "adj": "adjective", "adjective": "adjective",
+    "adv": "adverb", "adverb": "adverb",
+}
+
+_IRREGULAR = {
+    "children": "child", "men": "man", "women": "woman", "feet": "foot",
+    "teeth": "tooth", "mice": "mouse", "geese": "goose", "people": "person",
+    "went": "go", "gone": "go", "goes": "go", "was": "be", "were": "be", "been": "be",
+    "had": "have", "has": "have", "did": "do", "does": "do", "done": "do",
+    "said": "say", "made": "make", "took": "take", "taken": "take",
+    "came": "come", "saw": "see", "seen": "see", "knew": "know", "known": "know",
+    "gave": "give", "given": "give", "found": "find", "thought": "think",
+    "told": "tell", "became": "become", "brought": "bring", "began": "begin",
+    "begun": "begin", "wrote": "write", "written": "write", "stood": "stand",
+    "ran": "run", "ate": "eat", "eaten": "eat", "spoke": "speak", "spoken": "speak",
+    "fought": "fight", "caught": "catch", "taught": "teach", "sought": "seek",
+}
+
+_ADD_E_AFTER = ("v", "z", "c", "g", "u", "at", "bl", "dl", "tl", "iz", "ur")
+
+# Single vowel + single consonant at the end of a stem: "hop" (hoped) is more likely "hope"
+_SHORT_VOWEL_END = re.compile(r"(^|[^aeiou])[aeiou][^aeiouwxy]$")
+
+
+# ============================================================
+# 🧾 ENTRY FORMAT
+# ============================================================
+def normalize_entry(item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    One vocabulary/dictionary entry in canonical form, or None if it can't be used.
+    """
+
+    word = str(item.get("word", "")).strip()
+    part_of_speech = str(item.get("part_of_speech", "")).strip()
+    definition = str(item.get("definition", "")).strip()
+    example_sentence = str(item.get("example_sentence", "")).strip()
+    synonyms = item.get("synonyms", [])
+
+    if not word or not definition:
+        return None
+
+    # Ensure synonyms is a list
+    if not isinstance(synonyms, list):
+        synonyms = []
+
+    return {
+        "word": word,
+        "part_of_speech": part_of_speech or "unknown",
+        "definition": definition,
+        "example_sentence": example_sentence or f"Example: The word '{word}' is used in context.",
+        "synonyms": [str(s).strip() for s in synonyms if s],
+    }
+
+
+# ============================================================
+# 🔤 LEMMATIZER + PRONUNCIATION (local)
+# ============================================================
+@lru_cache(maxsize=50000)
+def _is_known_word(word: str) -> bool:
+    try:
+        import eng_to_ipa
+        return eng_to_ipa.isin_cmu(word)
+    except Exception:
+        return False
+
+
+def _candidates(word: str) -> list:
+    """Possible base forms, most likely first."""
+    out = []
+    if len(word) <= 3:
+        return out
+
+    if word.endswith("ies") and len(word) > 4:
+        out.append(word[:-3] + "y")
+    if word.endswith("ves"):
+        out += [word[:-1], word[:-3] + "f", word[:-3] + "fe"]
+    if word.endswith("es") and word[:-2].endswith(("s", "x", "z", "ch", "sh")):
+        out.append(word[:-2])
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        out.append(word[:-1])
+
+    if word.endswith("ied"):
+        out.append(word[:-3] + "y")
+    for suffix in ("ed", "ing"):
+        stem = word[: -len(suffix)]
+        if not word.endswith(suffix) or len(stem) < 3:
+            continue
+        if len(stem) > 3 and stem[-1] == stem[-2] and stem[-1] not in "lsz":
+            out.append(stem[:-1])                       # stopped -> stop
+        if stem.endswith(_ADD_E_AFTER) or _SHORT_VOWEL_END.search(stem):
+            out += [stem + "e", stem]                   # created -> create
+        else:
+            out += [stem, stem + "e"]                   # walked -> walk, hoped -> hope
+
+    return out
+
+
+@lru_cache(maxsize=50000)
+def lemmatize(word: str) -> str:
+    """
+    Rule-based lemma: irregular forms from a table, regular inflections by
+    suffix rules. A word the CMU dictionary (eng_to_ipa) knows is kept as
+    is ("news", "morning"); otherwise a suffix is stripped only when the
+    result is a known word. Without eng_to_ipa, only the table applies.
+    """
+    word = str(word).lower().strip()
+    if word in _IRREGULAR:
+        return _IRREGULAR[word]
+    if _is_known_word(word):
+        return word
+
+    for candidate in _candidates(word):
+        if _is_known_word(candidate):
+            return candidate
+    return word
+
+
+def pronounce_many(words) -> dict:
+    """word -> IPA ("" when unknown), one batched eng_to_ipa call."""
+    words = [str(w).lower() for w in words if w]
+    if not words:
+        return {}
+    try:
+        import eng_to_ipa
+        ipa = eng_to_ipa.convert(" ".join(words)).split()
+    except Exception:
+        return {w: "" for w in words}
+    if len(ipa) != len(words):
+        return {w: pronounce(w) for w in words}
+    return {w: ("" if p.endswith("*") else p) for w, p in zip(words, ipa)}
+
+
+@lru_cache(maxsize=5000)
+def pronounce(word: str) -> str:
+    """IPA for one word ("" when unknown or eng_to_ipa is missing)."""
+    try:
+        import eng_to_ipa
+        ipa = eng_to_ipa.convert(str(word).lower())
+    except Exception:
+        return ""
+    return "" if "*" in ipa else ipa
+
+
+def _normalize_pos(pos: str) -> str:
+    pos = str(pos or "").lower().strip().rstrip(".")
+    return POS_ALIASES.get(pos, POS_ALIASES.get(pos.split()[0] if pos else "", "other"))
+
+
+# ============================================================
+# 📖 STORE
+# ============================================================
+class Dictionary:
+
+    def __init__(self, path: str = DICTIONARY_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        with self._lock:
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    lemma TEXT,
+                    pos TEXT,
+                    grade TEXT,
+                    definition TEXT,
+                    example_sentence TEXT,
+                    synonyms TEXT,
+                    ipa TEXT,
+                    created REAL,
+                    PRIMARY KEY (lemma, pos, grade)
+                )
+                """
+            )
+            self.conn.commit()
+
+    # -------------------------------------------------------
+    def lookup_many(self, words, grade: str, pos: str = None) -> dict:
+        """word -> entry for every word already defined (any part of speech unless `pos`)."""
+        lemmas = {w: lemmatize(w) for w in words}
+        unique = sorted(set(lemmas.values()))
+        rows = []
+
+        with self._lock:
+            for i in range(0, len(unique), 500):
+                chunk = unique[i:i + 500]
+                query = (
+                    "SELECT lemma, pos, definition, example_sentence, synonyms, ipa FROM entries "
+                    f"WHERE grade = ? AND lemma IN ({','.join('?' * len(chunk))})"
+                )
+                params = [grade, *chunk]
+                if pos:
+                    query += " AND pos = ?"
+                    params.append(_normalize_pos(pos))
+                rows += self.conn.execute(query + " ORDER BY created", params).fetchall()
+
+        by_lemma = {}
+        for lemma, row_pos, definition, example, synonyms, ipa in rows:
+            by_lemma.setdefault(lemma, {
+                "lemma": lemma,
+                "part_of_speech": row_pos,
+                "definition": definition,
+                "example_sentence": example,
+                "synonyms": json.loads(synonyms or "[]"),
+                "ipa": ipa,
+            })
+
+        found = {w: {"word": w, **by_lemma[l]} for w, l in lemmas.items() if l in by_lemma}
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(lemmas) - len(found)
+        return found
+
+    def add_entries(self, items, grade: str) -> int:
+        """Store normalized vocabulary items (word, part_of_speech, definition, ...)."""
+        items = [i for i in items if i.get("word") and i.get("definition")]
+        ipa = pronounce_many([i["word"] for i in items if not i.get("ipa")])
+
+        rows = []
+        for item in items:
+            word = item["word"].lower()
+            rows.append((
+                lemmatize(word),
+                _normalize_pos(item.get("part_of_speech")),
+                grade,
+                item["definition"],
+                item.get("example_sentence", ""),
+                json.dumps(item.get("synonyms", [])),
+                item.get("ipa") or ipa.get(word, ""),
+                time.time(),
+            ))
+
+        with self._lock:
+            self.conn.executemany("INSERT OR REPLACE INTO entries VALUES (?,?,?,?,?,?,?,?)", rows)
+            self.conn.commit()
+        return len(rows)
+
+    # -------------------------------------------------------
+    def define_iter(self, client, words, grade: str, contexts: dict = None):
+        """
+        Yield an entry per word: stored ones immediately, then the misses as
+        a single streamed LLM call defines them (they are stored as they arrive).
+        """
+        words = list(dict.fromkeys(w.lower() for w in words if w))
+        found = self.lookup_many(words, grade)
+        for w in words:
+            if w in found:
+                yield found[w]
+
+        missing = [w for w in words if w not in found]
+        if not missing or client is None:
+            return
+
+        ipa = pronounce_many(missing)
+        for item in stream_chat_objects(
+            client,
+            normalize_entry,
+            model="gpt-4o-mini",
+            temperature=0.3,
+            messages=[
+                {"role": "system", "content": "You write precise, age-appropriate dictionary entries."},
+                {"role": "user", "content": _definition_prompt(missing, grade, contexts or {})},
+            ],
+        ):
+            word = item["word"].lower()
+            item = {
+                **item,
+                "word": word,
+                "lemma": lemmatize(word),
+                "part_of_speech": _normalize_pos(item.get("part_of_speech")),
+                "ipa": ipa.get(word) or pronounce(word),
+            }
+            self.add_entries([item], grade)
+            yield item
+
+    def define(self, client, words, grade: str, contexts: dict = None) -> dict:
+        return {e["word"]: e for e in self.define_iter(client, words, grade, contexts)}
+
+    def stats(self) -> dict:
+        with self._lock:
+            count = self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {"entries": count, "hits": self.hits, "misses": self.misses}
+
+
+def _definition_prompt(words, grade: str, contexts: dict) -> str:
+    lines = "\n".join(
+        f"- {w}" + (f' (as used in: "{contexts[w]}")' if contexts.get(w) else "")
+        for w in words
+    )
+    return f"""
+You are an expert vocabulary educator for grade {grade} students.
+
+Define each word below (in the sense of the quoted sentence, when given).
+
+Words:
+{lines}
+
+Return ONLY a JSON array, one object per word, in the same order:
+[
+  {{
+    "word": "string (exactly as listed)",
+    "part_of_speech": "noun | verb | adjective | adverb | other",
+    "definition": "string (clear, age-appropriate)",
+    "example_sentence": "string (a new, child-friendly sentence)",
+    "synonyms": ["string1", "string2"]
+  }}
+]
+""".strip()
+
+
+_DICTIONARY = None
+_DICTIONARY_LOCK = threading.Lock()
+
+
+def get_dictionary() -> Dictionary:
+    """Process-wide dictionary (works outside Streamlit too)."""
+    global _DICTIONARY
+    with _DICTIONARY_LOCK:
+        if _DICTIONARY is None:
+            _DICTIONARY = Dictionary()
+        return _DICTIONARY
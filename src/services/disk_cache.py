@@ -0,0 +1,112 @@
+"""
+Disk-backed key/value cache with a TTL, an entry limit and hit counters
+"""
+import os
+import json
+import time
+import sqlite3
+import threading
+
+
+class DiskCache:
+    """
+    JSON values in SQLite. Entries older than `ttl` seconds count as misses
+    and are dropped; past `max_entries` the least recently used ones go.
+    Safe to share between threads.
+    """
+
+    def __init__(self, path: str, ttl: float = 7 * 86400, max_entries: int = 5000):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+        with self._lock:
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT,
+                    created REAL,
+                    accessed REAL
+                )
+                """
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+            self.conn.commit()
+
+    # -------------------------------------------------------
+    def get(self, key: str, default=None):
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute("SELECT value, created FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return default
+
+            value, created = row
+            if now - created > self.ttl:
+                self.conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self.conn.commit()
+                self.misses += 1
+                self.expired += 1
+                return default
+
+            self.conn.execute("UPDATE cache SET accessed = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+            self.hits += 1
+        return json.loads(value)
+
+    def set(self, key: str, value):
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO cache VALUES (?,?,?,?)",
+                (key, json.dumps(value, ensure_ascii=False), now, now),
+            )
+            self._evict()
+            self.conn.commit()
+
+    def get_or_set(self, key: str, compute):
+        """Cached value for `key`, or compute(), store and return it (None is not stored)."""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            if value is not None:
+                self.set(key, value)
+        return value
+
+    def _evict(self):
+        # Caller holds the lock
+        count = self.conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self.conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed LIMIT ?)",
+                (excess,),
+            )
+            self.evictions += excess
+
+    def clear(self):
+        with self._lock:
+            self.conn.execute("DELETE FROM cache")
+            self.conn.commit()
+
+    # -------------------------------------------------------
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
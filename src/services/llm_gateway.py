@@ -0,0 +1,290 @@
+"""
+One gateway for every OpenAI call: pooled HTTP, per-endpoint limits, retries, coalescing
+"""
+import json
+import time
+import random
+import hashlib
+import threading
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+from src.utils.concurrency import is_rate_limited
+
+# Concurrent requests allowed per endpoint (across every session in the process)
+ENDPOINT_LIMITS = {
+    "chat": 16,
+    "embeddings": 8,
+    "moderations": 8,
+    "speech": 4,
+    "transcriptions": 4,
+}
+
+# Identical in-flight requests to these endpoints share one API call
+# (transcriptions take file objects, which can't be compared)
+COALESCED_ENDPOINTS = {"chat", "embeddings", "moderations", "speech"}
+
+MAX_CONNECTIONS = 64
+RETRIES = 3
+BASE_DELAY = 0.5
+MAX_DELAY = 20.0
+
+
+def _is_retryable(error: Exception) -> bool:
+    if is_rate_limited(error):
+        return True
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status >= 500 or status in (408, 409)
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def _retry_after(error: Exception):
+    """Seconds the server asked us to wait, if it said."""
+    response = getattr(error, "response", None)
+    try:
+        return min(float(response.headers.get("retry-after")), MAX_DELAY)
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class _GuardedStream:
+    """A streaming response that holds its endpoint slot until consumed or closed."""
+
+    def __init__(self, stream, release):
+        self._stream = stream
+        self._release = release
+        self._released = False
+
+    def _done(self):
+        if not self._released:
+            self._released = True
+            self._release()
+
+    def __iter__(self):
+        try:
+            yield from self._stream
+        finally:
+            self._done()
+
+    def close(self):
+        try:
+            if hasattr(self._stream, "close"):
+                self._stream.close()
+        finally:
+            self._done()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        self._done()
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._stream, name)
+
+
+class _RawEndpoint:
+    """`resource.with_raw_response` (used by LangChain's ChatOpenAI): `.create(...)` goes through the gateway."""
+
+    def __init__(self, gateway, name: str, resource):
+        self._gateway = gateway
+        self._name = name
+        self._resource = resource
+
+    def create(self, **kwargs):
+        # Raw responses are parsed by each caller, so they are never shared between callers
+        return self._gateway._send(self._name, self._resource.create, kwargs)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._resource, name)
+
+
+class _Endpoint:
+    """Stands in for an SDK resource (e.g. `client.chat.completions`): `.create(...)` goes through the gateway."""
+
+    def __init__(self, gateway, name: str, resource):
+        self._gateway = gateway
+        self._name = name
+        self._resource = resource
+
+    def create(self, **kwargs):
+        return self._gateway.call(self._name, self._resource.create, **kwargs)
+
+    @property
+    def with_raw_response(self):
+        return _RawEndpoint(self._gateway, self._name, self._resource.with_raw_response)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._resource, name)
+
+
+class LLMGateway:
+    """
+    OpenAI-client-shaped proxy shared by the whole app.
+
+    `gateway.chat.completions.create(...)`, `.embeddings.create`,
+    `.moderations.create`, `.audio.speech.create` and
+    `.audio.transcriptions.create` (and their `.with_raw_response.create`,
+    as LangChain uses) work as on `OpenAI()` (streaming included), but
+    every call:
+    - uses one pooled HTTP client
+    - waits for a per-endpoint slot (ENDPOINT_LIMITS)
+    - is retried with jittered exponential backoff on 429 / 5xx / network
+      errors (honouring Retry-After)
+    - shares the result of an identical request already in flight
+    - is counted per endpoint (`stats()`)
+    """
+
+    def __init__(self, client=None, limits: dict = None, retries: int = RETRIES,
+                 base_delay: float = BASE_DELAY, max_connections: int = MAX_CONNECTIONS):
+        if client is None:
+            import httpx
+            from dotenv import load_dotenv
+            from openai import OpenAI
+
+            # The gateway may be created at import time, before the app has loaded .env
+            load_dotenv()
+
+            http_client = httpx.Client(
+                limits=httpx.Limits(max_connections=max_connections,
+                                    max_keepalive_connections=max_connections // 2),
+                timeout=httpx.Timeout(120.0, connect=10.0),
+            )
+            client = OpenAI(http_client=http_client)
+
+        self._client = client
+        # Retries for routed calls are done here, where they can see every
+        # endpoint's load; anything reached through __getattr__ keeps the SDK's own
+        routed = client.with_options(max_retries=0) if hasattr(client, "with_options") else client
+        self.retries = retries
+        self.base_delay = base_delay
+
+        limits = {**ENDPOINT_LIMITS, **(limits or {})}
+        self._slots = {name: threading.BoundedSemaphore(n) for name, n in limits.items()}
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._counters = {
+            name: {"calls": 0, "coalesced": 0, "retries": 0, "rate_limited": 0,
+                   "errors": 0, "in_flight": 0, "seconds": 0.0}
+            for name in limits
+        }
+
+        self.chat = SimpleNamespace(completions=_Endpoint(self, "chat", routed.chat.completions))
+        self.embeddings = _Endpoint(self, "embeddings", routed.embeddings)
+        self.moderations = _Endpoint(self, "moderations", routed.moderations)
+        self.audio = SimpleNamespace(
+            speech=_Endpoint(self, "speech", routed.audio.speech),
+            transcriptions=_Endpoint(self, "transcriptions", routed.audio.transcriptions),
+        )
+
+    def __getattr__(self, name):
+        # Anything else (files, models, ...) goes straight to the SDK client
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._client, name)
+
+    # -------------------------------------------------------
+    def _count(self, endpoint: str, field: str, amount=1):
+        with self._lock:
+            self._counters[endpoint][field] += amount
+
+    def _release(self, endpoint: str):
+        self._count(endpoint, "in_flight", -1)
+        self._slots[endpoint].release()
+
+    @staticmethod
+    def _request_key(endpoint: str, kwargs: dict) -> str:
+        payload = json.dumps(kwargs, sort_keys=True, default=str)
+        return endpoint + ":" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _send(self, endpoint: str, fn, kwargs: dict):
+        """One API call under the endpoint's slot, retried on transient errors."""
+        streaming = bool(kwargs.get("stream"))
+
+        for attempt in range(self.retries + 1):
+            self._slots[endpoint].acquire()
+            self._count(endpoint, "in_flight")
+            start = time.monotonic()
+            try:
+                result = fn(**kwargs)
+            except Exception as e:
+                self._release(endpoint)
+                if is_rate_limited(e):
+                    self._count(endpoint, "rate_limited")
+                if attempt == self.retries or not _is_retryable(e):
+                    self._count(endpoint, "errors")
+                    raise
+                self._count(endpoint, "retries")
+                delay = _retry_after(e) or min(self.base_delay * (2 ** attempt), MAX_DELAY)
+                time.sleep(delay * (0.5 + random.random()))
+                continue
+            finally:
+                self._count(endpoint, "seconds", time.monotonic() - start)
+
+            self._count(endpoint, "calls")
+            if streaming:
+                # The slot is held until the caller has read (or closed) the stream
+                return _GuardedStream(result, lambda: self._release(endpoint))
+            self._release(endpoint)
+            return result
+
+    def call(self, endpoint: str, fn, **kwargs):
+        """Run `fn(**kwargs)` (an SDK `create`) through the gateway's limits, retries and coalescing."""
+        if kwargs.get("stream") or endpoint not in COALESCED_ENDPOINTS:
+            return self._send(endpoint, fn, kwargs)
+
+        key = self._request_key(endpoint, kwargs)
+        with self._lock:
+            shared = self._in_flight.get(key)
+            if shared is None:
+                shared = self._in_flight[key] = Future()
+                owner = True
+            else:
+                self._counters[endpoint]["coalesced"] += 1
+                owner = False
+
+        if not owner:
+            return shared.result()
+
+        try:
+            result = self._send(endpoint, fn, kwargs)
+            shared.set_result(result)
+            return result
+        except Exception as e:
+            shared.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    # -------------------------------------------------------
+    def stats(self) -> dict:
+        """Per-endpoint counters: calls, coalesced, retries, rate_limited, errors, in_flight, seconds."""
+        with self._lock:
+            return {
+                name: {**c, "seconds": round(c["seconds"], 2)}
+                for name, c in self._counters.items()
+            }
+
+
+_GATEWAY = None
+_GATEWAY_LOCK = threading.Lock()
+
+
+def get_gateway() -> LLMGateway:
+    """Process-wide gateway (works outside Streamlit too, e.g. in batch workers)."""
+    global _GATEWAY
+    with _GATEWAY_LOCK:
+        if _GATEWAY is None:
+            _GATEWAY = LLMGateway()
+        return _GATEWAY
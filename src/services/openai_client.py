@@ -1,25 +1,40 @@
 """
 OpenAI client initialization and caching
+
+Every client here is backed by the shared LLM gateway (pooled HTTP,
+per-endpoint limits, retries, request coalescing).
 """
 import streamlit as st
-from openai import OpenAI
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 
+from src.services.llm_gateway import get_gateway
+
+
+def chat_model(model: str = "gpt-4o-mini", temperature: float = 0.4) -> ChatOpenAI:
+    """LangChain chat model whose requests go through the gateway."""
+    gateway = get_gateway()
+    return ChatOpenAI(model=model, temperature=temperature,
+                      client=gateway.chat.completions, root_client=gateway)
+
+
+def embedding_model() -> OpenAIEmbeddings:
+    """LangChain embeddings whose requests go through the gateway."""
+    return OpenAIEmbeddings(client=get_gateway().embeddings)
+
 
 @st.cache_resource
 def get_openai_client():
-    """Get cached OpenAI client"""
-    return OpenAI()
+    """Get cached OpenAI client (the gateway; same interface as OpenAI())"""
+    return get_gateway()
 
 
 @st.cache_resource
 def get_llm():
     """Get cached LangChain LLM"""
-    return ChatOpenAI(model="gpt-4o-mini", temperature=0.4)
+    return chat_model(temperature=0.4)
 
 
 @st.cache_resource
 def get_embeddings():
     """Get cached OpenAI embeddings"""
-    return OpenAIEmbeddings()
-
+    return embedding_model()
@@ -4,12 +4,13 @@ from pypdf import PdfReader
 
 from langchain_community.vectorstores import Chroma
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
 from dotenv import load_dotenv
 
+from src.services.openai_client import embedding_model
+
 load_dotenv()
 
-embeddings = OpenAIEmbeddings()
+embeddings = embedding_model()
 
 
 class VectorStore:
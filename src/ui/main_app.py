@@ -1,7 +1,7 @@
 import streamlit as st
 from dotenv import load_dotenv
 from src.services.openai_client import get_openai_client
-from src.modules.speaking.ui import evaluate_speaking
+from src.modules.speaking.ui import evaluate_speaking, classroom_tab
 from src.modules.book_tutor.ui import ask_the_book_tab
 from src.modules.curriculum.ui import streamlit_page
 from src.ui.components import footer
@@ -24,6 +24,10 @@ client = get_openai_client()
 def cached_speaking_ui():
     return evaluate_speaking
 
+@st.cache_resource
+def cached_classroom_ui():
+    return classroom_tab
+
 @st.cache_resource
 def cached_book_ui():
     return ask_the_book_tab
@@ -58,8 +62,9 @@ def main():
     
     st.title("🐶 Luffy Learning – AI Education Coach")
 
-    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
+    tab1, tab_classroom, tab2, tab3, tab4, tab5, tab6 = st.tabs([
         "🗣️ Speaking / Practice",
+        "🏫 Classroom Reading",
         "📖 Ask The Book",
         "📚 Summarize Curriculum",
         "🎓 MCQ Generator",
@@ -75,6 +80,14 @@ def main():
             speaking_ui = cached_speaking_ui()  # only loads once
         speaking_ui(client)
 
+    # -----------------------------
+    # CLASSROOM READING (batch speaking)
+    # -----------------------------
+    with tab_classroom:
+        with st.spinner("Loading Classroom Mode…"):
+            classroom_ui = cached_classroom_ui()  # only loads once
+        classroom_ui(client)
+
     # -----------------------------
     # TAB 2 — ASK THE BOOK
     # -----------------------------
@@ -25,6 +25,7 @@ def render_sidebar():
         # Quick links to tabs
         st.markdown("""
         - 🗣️ **Speaking Practice** - Improve pronunciation
+        - 🏫 **Classroom Reading** - Assess a whole class at once
         - 📖 **Ask The Book** - AI reading tutor
         - 📚 **Curriculum** - Analyze curriculum
         - 🎓 **MCQ Generator** - Generate practice questions
@@ -47,6 +48,17 @@ def render_sidebar():
         else:
             st.warning("⚠️ API Key Not Set")
             st.info("Add OPENAI_API_KEY to your .env file")
+
+        # Per-endpoint API usage from the shared gateway
+        from src.services.llm_gateway import get_gateway
+        usage = {name: c for name, c in get_gateway().stats().items() if c["calls"] or c["errors"]}
+        if usage:
+            with st.expander("📡 API usage"):
+                for name, c in usage.items():
+                    st.caption(
+                        f"**{name}**: {c['calls']} calls, {c['coalesced']} shared, "
+                        f"{c['retries']} retries, {c['errors']} errors, {c['seconds']} s"
+                    )
         
         st.markdown("---")
         
@@ -0,0 +1,107 @@
+"""
+Bounded-concurrency helpers for fan-out LLM calls (and a shared rate-limited scheduler)
+"""
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+def with_retries(fn, *args, retries: int = 2, base_delay: float = 0.5, **kwargs):
+    """Call `fn`, retrying with jittered exponential backoff. Re-raises the last error."""
+    for attempt in range(retries + 1):
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(base_delay * (2 ** attempt) * (0.5 + random.random()))
+
+
+def map_bounded(fn, items, max_in_flight: int = 8, retries: int = 2, default=None):
+    """
+    Run `fn(item)` for every item with at most `max_in_flight` calls at once.
+    Results come back in input order; items that still fail after retries
+    get `default(item, error)` (or None).
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    def run(item):
+        try:
+            return with_retries(fn, item, retries=retries)
+        except Exception as e:
+            return default(item, e) if default else None
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_in_flight, len(items)))) as pool:
+        return list(pool.map(run, items))
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """True for an HTTP 429 / RateLimitError from any API client."""
+    return getattr(error, "status_code", None) == 429 or type(error).__name__ == "RateLimitError"
+
+
+class RateLimiter:
+    """
+    Shared scheduler for API calls from many threads:
+    - at most `max_in_flight` calls at once
+    - at most `requests_per_minute` call starts (token bucket), if given
+    - a 429 from any caller pauses everyone for a jittered cooldown
+    """
+
+    def __init__(self, max_in_flight: int = 8, requests_per_minute: int = None, cooldown: float = 2.0):
+        self.max_in_flight = max_in_flight
+        self.requests_per_minute = requests_per_minute
+        self.cooldown = cooldown
+
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self._tokens = float(requests_per_minute or 0)
+        self._refilled = time.monotonic()
+        self._paused_until = 0.0
+        self.calls = 0
+        self.rate_limited = 0
+
+    def _wait_turn(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = self._paused_until - now
+
+                if wait <= 0 and self.requests_per_minute:
+                    rate = self.requests_per_minute / 60
+                    self._tokens = min(self.requests_per_minute, self._tokens + (now - self._refilled) * rate)
+                    self._refilled = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / rate
+                elif wait <= 0:
+                    return
+
+            time.sleep(wait)
+
+    def call(self, fn, *args, retries: int = 3, **kwargs):
+        """Run `fn` under the shared limits, retrying 429s and transient errors."""
+        for attempt in range(retries + 1):
+            with self._slots:
+                self._wait_turn()
+                with self._lock:
+                    self.calls += 1
+                try:
+                    return fn(*args, **kwargs)
+                except Exception as e:
+                    if attempt == retries:
+                        raise
+                    throttled = is_rate_limited(e)
+
+            delay = self.cooldown * (2 ** attempt) * (0.5 + random.random())
+            if throttled:
+                # Everyone waits, not just this caller
+                with self._lock:
+                    self.rate_limited += 1
+                    self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            else:
+                time.sleep(delay)
@@ -0,0 +1,113 @@
+"""
+Incremental JSON-array parsing for streamed LLM output
+"""
+import json
+
+
+class JsonArrayStream:
+    """
+    Feed text chunks as they arrive; every object that sits directly inside
+    an array is returned as soon as its closing brace is seen.
+
+    Works for a bare `[{...}, ...]` as well as `{"items": [{...}]}`, ignores
+    chatter or code fences around the JSON, and skips (rather than fails on)
+    items that don't parse.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0            # next character to scan
+        self._stack = []         # open containers: "[" or "{"
+        self._start = None       # buffer index where the captured object began
+        self._capture_depth = 0  # stack depth while the captured object is open
+        self._in_string = False
+        self._escape = False
+        self.skipped = 0         # malformed items dropped
+
+    def feed(self, chunk: str) -> list:
+        if not chunk:
+            return []
+
+        buf = self._buffer + chunk
+        found = []
+        i = self._pos
+
+        while i < len(buf):
+            ch = buf[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+
+            elif ch == '"':
+                # Strings only count inside the JSON itself, not in surrounding chatter
+                self._in_string = bool(self._stack)
+
+            elif ch == "[" or ch == "{":
+                if ch == "{" and self._start is None and self._stack and self._stack[-1] == "[":
+                    self._start = i
+                    self._capture_depth = len(self._stack) + 1
+                self._stack.append(ch)
+
+            elif (ch == "]" or ch == "}") and self._stack:
+                closing_capture = ch == "}" and self._start is not None and len(self._stack) == self._capture_depth
+                self._stack.pop()
+
+                if closing_capture:
+                    found.extend(self._emit(buf[self._start:i + 1]))
+                    # Everything up to here is consumed; keep the buffer small
+                    buf = buf[i + 1:]
+                    self._start = None
+                    i = 0
+                    continue
+
+            i += 1
+
+        if self._start is None:
+            # Nothing captured is pending; drop scanned text
+            buf, i = buf[i:], 0
+        elif self._start:
+            buf, i = buf[self._start:], i - self._start
+            self._start = 0
+
+        self._buffer = buf
+        self._pos = i
+        return found
+
+    def _emit(self, text: str) -> list:
+        try:
+            item = json.loads(text)
+        except ValueError:
+            self.skipped += 1
+            return []
+        return [item] if isinstance(item, dict) else []
+
+
+def iter_json_objects(chunks):
+    """Yield objects from an iterable of text chunks as each one completes."""
+    parser = JsonArrayStream()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+
+
+def _stream_text(client, **create_kwargs):
+    stream = client.chat.completions.create(stream=True, **create_kwargs)
+    for chunk in stream:
+        if chunk.choices:
+            yield chunk.choices[0].delta.content or ""
+
+
+def stream_chat_objects(client, validate, **create_kwargs):
+    """
+    Stream a chat completion and yield `validate(item)` for each array item
+    as it arrives. Items for which `validate` returns None are dropped, so
+    one bad item (or a cut-off response) never discards the good ones.
+    """
+    for item in iter_json_objects(_stream_text(client, **create_kwargs)):
+        valid = validate(item)
+        if valid is not None:
+            yield valid
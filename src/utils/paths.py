@@ -0,0 +1,7 @@
+"""
+Project-wide filesystem locations
+"""
+import os
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DATA_DIR = os.path.join(PROJECT_ROOT, "data")
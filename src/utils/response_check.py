@@ -1,13 +1,14 @@
-from openai import OpenAI
-from langchain_openai import OpenAIEmbeddings
 import numpy as np
 from sklearn.metrics.pairwise import cosine_similarity
 from transformers import pipeline
 
+from src.services.llm_gateway import get_gateway
+from src.services.openai_client import embedding_model
+
 moderator = pipeline("text-classification", model="unitary/toxic-bert")
 
-client = OpenAI()
-embeddings = OpenAIEmbeddings()
+client = get_gateway()
+embeddings = embedding_model()
 
 
 class ResponseCheck:
@@ -1,11 +1,12 @@
 import streamlit as st
 from io import BytesIO
-from openai import OpenAI
 from dotenv import load_dotenv
 
+from src.services.llm_gateway import get_gateway
+
 load_dotenv()
 
-client = OpenAI()
+client = get_gateway()
 
 
 class TextToSpeech:
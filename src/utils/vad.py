@@ -0,0 +1,184 @@
+"""
+Voice-activity detection: trim silence and compress long pauses before transcription
+"""
+from io import BytesIO
+from dataclasses import dataclass, field
+
+import numpy as np
+
+
+# ============================================================
+# 📦 ENCODINGS
+# ============================================================
+# format -> (soundfile format, subtype, mime type, upload filename)
+ENCODINGS = {
+    "flac": ("FLAC", "PCM_16", "audio/flac", "speech.flac"),
+    "opus": ("OGG", "OPUS", "audio/ogg", "speech.ogg"),
+}
+
+
+# ============================================================
+# 🧾 RESULT
+# ============================================================
+@dataclass
+class VadResult:
+    audio: np.ndarray                                # trimmed mono float32 samples
+    sr: int
+    original_duration: float                         # seconds
+    speech_segments: list = field(default_factory=list)  # [(start, end)] seconds, original audio
+    time_map: list = field(default_factory=list)         # [(out_start, src_start, duration)] seconds
+    pauses: list = field(default_factory=list)           # [(start, end)] internal silences, original audio
+
+    @property
+    def duration(self) -> float:
+        return len(self.audio) / self.sr if self.sr else 0.0
+
+    def to_original(self, t: float) -> float:
+        """Map a timestamp in the trimmed audio back to the original recording."""
+        src = 0.0
+        for out_start, src_start, dur in self.time_map:
+            if t < out_start:
+                break
+            src = src_start + min(t - out_start, dur)
+        return src
+
+    def fluency(self, long_pause: float = 1.0) -> dict:
+        speech = sum(e - s for s, e in self.speech_segments)
+        pause_lengths = [e - s for s, e in self.pauses]
+        return {
+            "speaking_seconds": round(speech, 2),
+            "total_seconds": round(self.original_duration, 2),
+            "pause_count": len(pause_lengths),
+            "long_pause_count": sum(1 for p in pause_lengths if p >= long_pause),
+            "mean_pause_seconds": round(float(np.mean(pause_lengths)), 2) if pause_lengths else 0.0,
+        }
+
+    def encode(self, fmt: str = "flac"):
+        """Returns (filename, bytes, mime type) ready for upload."""
+        import soundfile as sf
+
+        sf_format, subtype, mime, filename = ENCODINGS[fmt]
+        buf = BytesIO()
+        sf.write(buf, self.audio, self.sr, format=sf_format, subtype=subtype)
+        return filename, buf.getvalue(), mime
+
+
+# ============================================================
+# 🔍 FRAME-LEVEL DETECTION (vectorized)
+# ============================================================
+def speech_mask(y, sr, frame_ms=30, hop_ms=10, margin_db=6.0, range_db=35.0,
+                zcr_threshold=0.25, hangover_ms=80):
+    """
+    Returns (mask, hop, frame_len): one boolean per frame marking speech.
+
+    Energy decides voiced speech; a high zero-crossing rate rescues quieter
+    unvoiced consonants (s, f, th) just below the energy threshold.
+    """
+    frame_len = max(1, int(sr * frame_ms / 1000))
+    hop = max(1, int(sr * hop_ms / 1000))
+
+    if len(y) < frame_len:
+        return np.ones(1, dtype=bool), hop, frame_len
+
+    frames = np.lib.stride_tricks.sliding_window_view(y, frame_len)[::hop]
+
+    energy_db = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+    signs = np.signbit(frames)
+    zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+
+    loud = np.percentile(energy_db, 95)
+    floor = np.percentile(energy_db, 10)
+
+    # Flat energy = all speech or all silence; don't guess, keep everything
+    if loud - floor < margin_db:
+        return np.ones(len(frames), dtype=bool), hop, frame_len
+
+    threshold = max(floor + margin_db, loud - range_db)
+    mask = (energy_db > threshold) | ((energy_db > threshold - 8) & (zcr > zcr_threshold))
+
+    # Hangover: keep a few frames around speech so word edges aren't clipped
+    k = max(0, int(hangover_ms / hop_ms))
+    if k:
+        mask = np.convolve(mask.astype(np.int8), np.ones(2 * k + 1, dtype=np.int8), "same") > 0
+
+    return mask, hop, frame_len
+
+
+def _mask_to_segments(mask, hop, frame_len, n_samples, min_speech):
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1) - 1
+
+    seg_starts = starts * hop
+    seg_ends = np.minimum(ends * hop + frame_len, n_samples)
+
+    keep = (seg_ends - seg_starts) >= min_speech
+    return list(zip(seg_starts[keep].tolist(), seg_ends[keep].tolist()))
+
+
+# ============================================================
+# ✂️ TRIM + PAUSE COMPRESSION
+# ============================================================
+def trim_silence(y, sr, pad=0.1, max_pause=0.5, keep_pause=0.3, min_speech=0.06, min_pause=0.25):
+    """
+    Trim leading/trailing silence and shorten internal pauses longer than
+    `max_pause` down to `keep_pause`. Keeps a time map to the original audio.
+    """
+    y = np.asarray(y, dtype=np.float32)
+    n = len(y)
+    original_duration = n / sr
+
+    mask, hop, frame_len = speech_mask(y, sr)
+    segments = _mask_to_segments(mask, hop, frame_len, n, int(min_speech * sr))
+
+    if not segments:
+        return VadResult(y, sr, original_duration, [(0.0, original_duration)],
+                         [(0.0, 0.0, original_duration)], [])
+
+    # Internal pauses (between detected speech) feed fluency metrics
+    pauses = [
+        (prev_end / sr, start / sr)
+        for (_, prev_end), (start, _) in zip(segments, segments[1:])
+        if (start - prev_end) / sr >= min_pause
+    ]
+
+    # Pad speech, then decide what silence survives between segments
+    pad_n = int(pad * sr)
+    max_pause_n = int(max(max_pause, keep_pause) * sr)
+    half_keep = int(keep_pause * sr) // 2
+
+    kept = []
+    for start, end in segments:
+        start, end = max(0, start - pad_n), min(n, end + pad_n)
+        if kept and start - kept[-1][1] <= max_pause_n:
+            kept[-1][1] = max(kept[-1][1], end)
+        elif kept:
+            kept[-1][1] += half_keep
+            kept.append([start - half_keep, end])
+        else:
+            kept.append([start, end])
+
+    time_map = []
+    out = 0
+    for start, end in kept:
+        time_map.append((out / sr, start / sr, (end - start) / sr))
+        out += end - start
+
+    audio = np.concatenate([y[start:end] for start, end in kept])
+
+    return VadResult(
+        audio=audio,
+        sr=sr,
+        original_duration=original_duration,
+        speech_segments=[(s / sr, e / sr) for s, e in segments],
+        time_map=time_map,
+        pauses=pauses,
+    )
+
+
+def prepare_speech(audio_bytes: bytes, sr: int = 16000, **kwargs) -> VadResult:
+    """Decode audio bytes (any format librosa reads) and VAD-trim it."""
+    import librosa
+
+    y, sr = librosa.load(BytesIO(audio_bytes), sr=sr, mono=True)
+    return trim_silence(y, sr, **kwargs)
@@ -0,0 +1,94 @@
+"""
+Tests for the cover proxy against a real local HTTP server
+"""
+import threading
+from io import BytesIO
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("streamlit")
+Image = pytest.importorskip("PIL.Image")
+
+from src.modules.book_recommendations.covers import CoverCache, THUMBNAIL_SIZE, is_public_url  # noqa: E402
+
+
+def _png(size=(600, 900)) -> bytes:
+    out = BytesIO()
+    Image.new("RGB", size, (200, 40, 40)).save(out, format="PNG")
+    return out.getvalue()
+
+
+@pytest.fixture(scope="module")
+def image_server():
+    """Serves /cover.png and /tiny.png on 127.0.0.1; yields the base URL and request paths seen."""
+    routes = {"/cover.png": _png(), "/tiny.png": _png((10, 10))}
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests.append(self.path)
+            body = routes.get(self.path)
+            if body is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", requests
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetches_and_caches_thumbnail(tmp_path, image_server):
+    base, requests = image_server
+    covers = CoverCache(cache_dir=str(tmp_path), allow_private_hosts=True)
+
+    thumb = covers.get(f"{base}/cover.png")
+    assert thumb is not None and thumb[:2] == b"\xff\xd8"          # JPEG
+    width, height = Image.open(BytesIO(thumb)).size
+    assert width <= THUMBNAIL_SIZE[0] and height <= THUMBNAIL_SIZE[1]
+
+    fetched = requests.count("/cover.png")
+    assert covers.get(f"{base}/cover.png") == thumb
+    assert requests.count("/cover.png") == fetched                   # served from the cache
+    assert covers.stats()["fetched"] == 1
+
+
+def test_rejects_placeholders_and_missing_images(tmp_path, image_server):
+    base, _ = image_server
+    covers = CoverCache(cache_dir=str(tmp_path), allow_private_hosts=True)
+
+    assert covers.get(f"{base}/tiny.png") is None
+    assert covers.get(f"{base}/missing.png") is None
+    assert covers.stats()["failed"] == 2
+
+
+def test_private_hosts_refused_by_default(tmp_path, image_server):
+    base, requests = image_server
+    before = len(requests)
+    covers = CoverCache(cache_dir=str(tmp_path))
+
+    assert covers.get(f"{base}/cover.png") is None
+    assert len(requests) == before
+
+
+@pytest.mark.parametrize("url, public", [
+    ("http://127.0.0.1/x.png", False),
+    ("http://10.0.0.5/x.png", False),
+    ("http://169.254.169.254/latest", False),
+    ("http://[::1]/x.png", False),
+    ("ftp://8.8.8.8/x.png", False),
+    ("https://8.8.8.8/x.png", True),
+])
+def test_is_public_url(url, public):
+    assert is_public_url(url) is public
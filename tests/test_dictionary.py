@@ -0,0 +1,73 @@
+"""
+Tests for the shared dictionary's lemmatizer and store
+"""
+import threading
+
+import pytest
+
+from src.services import dictionary
+from src.services.dictionary import Dictionary, lemmatize
+
+KNOWN_WORDS = {
+    "news", "new", "morning", "morn", "nothing", "wedding", "wed",
+    "walk", "stop", "hope", "city", "box", "go",
+}
+
+
+@pytest.fixture(autouse=True)
+def known_words(monkeypatch):
+    """A fixed vocabulary instead of the CMU dictionary, so results don't depend on eng_to_ipa."""
+    monkeypatch.setattr(dictionary, "_is_known_word", lambda word: word in KNOWN_WORDS)
+    lemmatize.cache_clear()
+    yield
+    lemmatize.cache_clear()
+
+
+@pytest.mark.parametrize("word", ["news", "morning", "nothing", "wedding"])
+def test_known_words_are_not_stripped(word):
+    assert lemmatize(word) == word
+
+
+@pytest.mark.parametrize("word, lemma", [
+    ("walked", "walk"),
+    ("stopped", "stop"),
+    ("hoped", "hope"),
+    ("cities", "city"),
+    ("boxes", "box"),
+])
+def test_suffix_stripped_to_known_word(word, lemma):
+    assert lemmatize(word) == lemma
+
+
+def test_irregular_forms():
+    assert lemmatize("goes") == "go"
+    assert lemmatize("Children") == "child"
+
+
+def test_unknown_word_without_known_base_is_kept():
+    assert lemmatize("blorfed") == "blorfed"
+
+
+def test_lookup_counts_hits_and_misses_across_threads(tmp_path):
+    store = Dictionary(str(tmp_path / "dictionary.db"))
+    store.add_entries(
+        [{"word": "walk", "part_of_speech": "verb", "definition": "To move on foot.", "ipa": "wɔk"}],
+        grade="3-5",
+    )
+
+    found = store.lookup_many(["walked", "news"], grade="3-5")
+    assert set(found) == {"walked"}
+    assert found["walked"]["lemma"] == "walk"
+
+    threads = [
+        threading.Thread(target=lambda: [store.lookup_many(["walk", "news"], "3-5") for _ in range(50)])
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stats = store.stats()
+    assert stats["hits"] == 1 + 8 * 50
+    assert stats["misses"] == 1 + 8 * 50